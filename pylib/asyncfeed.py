@@ -0,0 +1,114 @@
+import time
+import codecs
+import asyncio
+from collections import deque
+from streaming import RecordSplitter, _parse_record
+from symbols import SymbolTable
+
+# parser para documentos que chegam aos poucos num asyncio
+# (sockets, pipes), com os mesmos registros do streaming.iterparse.
+#
+#     parser = FeedParser("mod")
+#     parser.feed(b"a 1\nb ")   # bytes em qualquer ponto,
+#     parser.feed(b"2\n")       # ate no meio de um caractere utf-8
+#     parser.close()
+#     async for res in parser:  # um Result por expressao de topo
+#         ...
+#
+# Strings, numeros e a indentacao nunca atravessam linhas, entao
+# guardar a linha incompleta entre os pedacos basta para o lexer.
+# Cada registro eh parseado quando alguem pede o proximo Result,
+# e o parser devolve o controle ao loop (asyncio.sleep(0)) sempre
+# que passa budget segundos sem devolver, entao muitos registros
+# nao travam o loop. Um registro sozinho eh parseado de uma vez.
+
+DEFAULT_BUDGET = 0.005
+
+class FeedParser:
+    def __init__(self, modname, symbols=None, encoding="utf-8", budget=DEFAULT_BUDGET):
+        if symbols == None:
+            symbols = SymbolTable()
+        self.modname = modname
+        self.symbols = symbols
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.splitter = RecordSplitter()
+        self.budget = budget
+        self.records = deque() # (texto, linha) ainda nao parseados
+        self.results = deque()
+        self.closed = False
+        self.failed = False
+        self.fed = asyncio.Event()
+        self.last_yield = time.perf_counter()
+
+    def feed(self, data):
+        if self.closed:
+            raise ValueError("feed after close")
+        text = self.decoder.decode(data)
+        self.records.extend(self.splitter.feed(text))
+        self.fed.set()
+
+    def close(self):
+        if self.closed:
+            return
+        text = self.decoder.decode(b"", True)
+        self.records.extend(self.splitter.feed(text))
+        self.records.append(self.splitter.close())
+        self.closed = True
+        self.fed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            res = await self._next_ready()
+            if res != None:
+                return res
+            if self.closed or self.failed:
+                raise StopAsyncIteration
+            self.fed.clear()
+            await self.fed.wait()
+
+    # os Results dos registros que ja chegaram inteiros,
+    # sem esperar por mais bytes
+    async def available(self):
+        while True:
+            res = await self._next_ready()
+            if res == None:
+                return
+            yield res
+
+    async def _next_ready(self):
+        while len(self.results) == 0:
+            if self.failed or len(self.records) == 0:
+                return None
+            now = time.perf_counter()
+            if now - self.last_yield > self.budget:
+                await asyncio.sleep(0)
+                self.last_yield = time.perf_counter()
+            text, line = self.records.popleft()
+            for res in _parse_record(self.modname, text, line, self.symbols):
+                self.results.append(res)
+                if res.failed():
+                    # como no iterparse, nada depois do primeiro erro
+                    self.failed = True
+                    self.records.clear()
+                    break
+        return self.results.popleft()
+
+# le um asyncio.StreamReader ate o fim, com um
+# Result por expressao de topo assim que ela termina
+async def iterparse_reader(modname, reader, chunk_size=65536, symbols=None):
+    parser = FeedParser(modname, symbols)
+    while True:
+        data = await reader.read(chunk_size)
+        if len(data) == 0:
+            parser.close()
+        else:
+            parser.feed(data)
+        async for res in parser.available():
+            yield res
+            if res.failed():
+                return
+        if len(data) == 0:
+            return
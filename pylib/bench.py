@@ -0,0 +1,623 @@
+#!/bin/python
+# so tempos e memoria; a corretude fica nos testes em tests/
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import tempfile
+import tracemalloc
+import lexkind
+import nodekind
+import binast
+import corpus
+import numeric
+import loader
+from core import Lexeme
+from lexer import Lexer, FastLexer, lex, _process_str
+from tokens import tokenize
+from parser import parse, parse_iterative, parse_stream
+from compact import parse_compact
+from recovery import parse_recovering
+from incremental import Document
+from cache import ParseCache
+from emit import write_sexpr, write_json
+from sourcemap import SourceMap
+from symbols import SymbolTable
+from query import compile_query, KeyIndex
+from frozen import parse_frozen, HashConsTable
+from treediff import Snapshot
+
+# mede o tempo de lexing do Lexer original contra o FastLexer
+# usando os arquivos de suite/ repetidos ate formar um documento grande
+
+def suite_source(repeat):
+    suite = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "..", "suite")
+    out = []
+    for name in sorted(os.listdir(suite)):
+        if name.endswith(".puls"):
+            with open(os.path.join(suite, name), 'r', encoding='utf-8') as f:
+                out.append(f.read())
+    return "\n".join(out) * repeat
+
+def all_tokens(lexer):
+    # inclui o INVALID/EOF final
+    out = []
+    l = lexer.next()
+    out.append(l)
+    while not (l.kind in [lexkind.EOF, lexkind.INVALID]):
+        l = lexer.next()
+        out.append(l)
+    return out
+
+# melhor de algumas execucoes, para diminuir o ruido
+def timeit(fn, runs=5):
+    best = None
+    out = None
+    i = 0
+    while i < runs:
+        start = time.perf_counter()
+        out = fn()
+        t = time.perf_counter() - start
+        if best == None or t < best:
+            best = t
+        i += 1
+    return out, best
+
+def bench_lexer(repeat):
+    source = suite_source(repeat)
+    slow, slow_t = timeit(lambda: all_tokens(Lexer("bench", source)))
+    fast, fast_t = timeit(lambda: all_tokens(FastLexer("bench", source)))
+    print(f"bytes:     {len(source)}")
+    print(f"tokens:    {len(fast)}")
+    print(f"Lexer:     {slow_t:.3f}s")
+    print(f"FastLexer: {fast_t:.3f}s")
+    print(f"speedup:   {slow_t/fast_t:.1f}x")
+
+def peak_memory(fn):
+    tracemalloc.start()
+    out = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, peak
+
+def bench_stream(repeat):
+    source = suite_source(repeat)
+    lexemes, lex_mem = peak_memory(lambda: lex("bench", source))
+    stream, stream_mem = peak_memory(lambda: tokenize("bench", source))
+    _, lex_t = timeit(lambda: lex("bench", source))
+    _, stream_t = timeit(lambda: tokenize("bench", source))
+
+    print(f"lex:       {lex_t:.3f}s {lex_mem/1024:.0f}KiB")
+    print(f"tokenize:  {stream_t:.3f}s {stream_mem/1024:.0f}KiB")
+    print(f"memory:    {lex_mem/stream_mem:.1f}x less")
+
+    # a arvore do parse_stream guarda o stream e nao um Lexeme e
+    # um Range por token, entao o total retido fica menor
+    _, tree_mem = retained_memory(lambda: parse("bench", source, False))
+    _, stream_tree_mem = retained_memory(lambda: parse_stream(tokenize("bench", source), False))
+    print(f"parse:        {tree_mem/1024:.0f}KiB retained")
+    print(f"parse_stream: {stream_tree_mem/1024:.0f}KiB retained")
+
+# memoria residente da arvore depois do parse,
+# a arvore normal contra a compacta
+def bench_compact(repeat):
+    source = suite_source(repeat)
+    tree, tree_mem = retained_memory(lambda: parse("bench", source, False))
+    ctree, ctree_mem = retained_memory(lambda: parse_compact("bench", source))
+
+    print(f"Node tree:    {tree_mem/1024:.0f}KiB")
+    print(f"compact tree: {ctree_mem/1024:.0f}KiB")
+    print(f"memory:       {tree_mem/ctree_mem:.1f}x less")
+
+# uma edicao no meio do documento contra o parse completo
+def bench_incremental(repeat):
+    source = suite_source(repeat)
+    doc = Document("bench", source)
+    _, full_t = timeit(lambda: parse("bench", source, False))
+
+    middle = source.find("\n", len(source)//2) + 1
+    # digitar um caractere e apagar de novo
+    _, char_t = timeit(lambda: (doc.edit(middle, 0, "x"),
+                                doc.edit(middle, 1, "")))
+    # quebra de linha, que desloca todas as linhas seguintes
+    _, nl_t = timeit(lambda: (doc.edit(middle, 0, "\n"),
+                              doc.edit(middle, 1, "")))
+
+    print(f"lines:          {source.count(chr(10))}")
+    print(f"full parse:     {full_t*1000:.1f}ms")
+    print(f"edit char:      {char_t*1000/2:.2f}ms")
+    print(f"edit newline:   {nl_t*1000/2:.2f}ms")
+
+# documento profundo: S_Exprs e blocos indentados aninhados
+# depth niveis, repetidos ate ter o mesmo tamanho do suite
+def deep_source(depth, size):
+    brackets = "[" * depth + "a.b c" + "]" * depth + "\n"
+    indent = ""
+    i = 0
+    while i < depth:
+        indent += " " * i + "x y\n"
+        i += 1
+    unit = brackets + indent
+    return unit * (size // len(unit) + 1)
+
+def bench_iterative(repeat):
+    wide = suite_source(repeat)
+    # abaixo do limite de recursao, para o parser recursivo conseguir
+    deep = deep_source(150, len(wide))
+    for name, source in [("wide", wide), ("deep", deep)]:
+        _, rec_t = timeit(lambda: parse("bench", source, False), 3)
+        _, it_t = timeit(lambda: parse_iterative("bench", source, False), 3)
+        print(f"{name+':':<10} recursive {rec_t:.3f}s iterative {it_t:.3f}s "
+              f"({rec_t/it_t:.2f}x)")
+
+    # o parser iterativo nao tem limite de profundidade
+    depth = sys.getrecursionlimit() * 10
+    source = deep_source(depth, 0)
+    _, t = timeit(lambda: parse_iterative("bench", source, False), 1)
+    print(f"depth {depth}: iterative {t:.3f}s")
+
+# parse completo contra carregar a arvore do cache em disco
+def bench_cache(repeat):
+    source = suite_source(repeat)
+    directory = tempfile.mkdtemp()
+    try:
+        cache = ParseCache(directory)
+        res, parse_t = timeit(lambda: parse("bench", source, False))
+        cache.put(source, res)
+        _, load_t = timeit(lambda: cache.get("bench", source))
+        print(f"parse:      {parse_t:.3f}s")
+        print(f"cache load: {load_t:.3f}s ({cache.size/1024:.0f}KiB)")
+        print(f"speedup:    {parse_t/load_t:.1f}x")
+    finally:
+        shutil.rmtree(directory)
+
+# abrir a arvore binaria contra parsear o codigo fonte
+def bench_binast(repeat):
+    source = suite_source(repeat)
+    res, parse_t = timeit(lambda: parse("bench", source, False))
+    data = binast.dumps(res.value, source)
+    _, open_t = timeit(lambda: binast.loads(data).root())
+    _, load_t = timeit(lambda: binast.loads(data).to_node())
+    print(f"source:      {len(source)/1024:.0f}KiB")
+    print(f"binary:      {len(data)/1024:.0f}KiB")
+    print(f"parse:       {parse_t:.3f}s")
+    print(f"open:        {open_t*1000000:.0f}us")
+    print(f"to_node:     {load_t:.3f}s")
+
+# o Node.__str__ antigo, com concatenacao de strings e recursao,
+# so para comparar o tempo com emit.write_sexpr
+def old_str(node):
+    out = ""
+    for leaf in node.leaves:
+        out += old_print_tree(leaf, 0)
+    return out
+
+def old_print_tree(node, indent):
+    if node.kind == nodekind.TERMINAL:
+        return node.value.text
+    if len(node.leaves) == 0:
+        return "()"
+    out = ""
+    line = node.range.start.line
+    i = 0
+    broken = False
+    while i < len(node.leaves):
+        n = node.leaves[i]
+        curr_line = n.range.start.line
+        if line < curr_line:
+            out += "\n" + "  " * indent
+            line = curr_line
+            if not broken:
+                indent += 1
+            broken = True
+        if i == 0:
+            out += "("
+        out += old_print_tree(n, indent)
+        if i < len(node.leaves)-1:
+            out += " "
+        i += 1
+    out += ")"
+    return out
+
+def bench_emit(repeat):
+    wide = suite_source(repeat)
+    # a concatenacao do __str__ antigo copia a saida de cada nivel
+    # de novo no nivel de cima, entao arvores profundas sao o pior caso
+    line = "[x " * 300 + "]" * 300 + "\n"
+    deep = line * (len(wide) // len(line) + 1)
+    null = open(os.devnull, 'w')
+    for name, source in [("wide", wide), ("deep", deep)]:
+        res = parse_iterative("bench", source, False)
+        _, old_t = timeit(lambda: old_str(res.value), 3)
+        _, new_t = timeit(lambda: write_sexpr(res.value, io.StringIO()), 3)
+        _, json_t = timeit(lambda: write_json(res.value, null), 3)
+        print(f"{name}:")
+        print(f"  old __str__: {old_t:.3f}s")
+        print(f"  write_sexpr: {new_t:.3f}s")
+        print(f"  write_json:  {json_t:.3f}s")
+    null.close()
+
+# I_Exprs aninhadas depth niveis, cada uma comecando com uma
+# S_Expr. O tempo por linha tem que ficar constante quando
+# a profundidade dobra, ja que nenhum range eh recalculado
+def nested_source(depth):
+    out = []
+    i = 0
+    while i < depth:
+        out.append(" " * i + "[a [b c]].d e")
+        i += 1
+    return "\n".join(out) + "\n"
+
+def bench_ranges(repeat):
+    null = open(os.devnull, 'w')
+    depth = 250
+    while depth <= 2000:
+        source = nested_source(depth)
+        _, parse_t = timeit(lambda: parse_iterative("bench", source, False), 3)
+        res = parse_iterative("bench", source, False)
+        _, print_t = timeit(lambda: write_sexpr(res.value, null), 3)
+        print(f"depth {depth:>5}: parse {parse_t*1000000/depth:.1f}us/line "
+              f"print {print_t*1000000/depth:.1f}us/line")
+        depth *= 2
+    null.close()
+
+# o extract_offense antigo do cli, que percorre o arquivo inteiro
+def old_extract_offense(range, program):
+    p_line_start = None
+    p_index_start = 0
+    p_line_end = None
+    p_index_end = 0
+    lines = 0
+    columns = 0
+    index = 0
+    for c in program:
+        index += 1
+        columns += 1
+        if c == "\n":
+            lines += 1
+            columns = 0
+        if lines == range.start.line and p_line_start == None:
+            p_line_start = index
+        if lines == range.end.line:
+            p_line_end = index
+        if lines == range.start.line and columns == range.start.column:
+            p_index_start = index
+        if lines == range.end.line and columns == range.end.column:
+            p_index_end = index
+    offense = program[p_line_start:p_index_start]
+    offense += "\033[0;31m"
+    offense += program[p_index_start:p_index_end]
+    offense += "\033[0m"
+    offense += program[p_index_end:p_line_end]
+    return offense
+
+# um erro no fim de um arquivo grande
+def bench_sourcemap(repeat):
+    source = suite_source(repeat) + "a ] b\n"
+    r = parse("bench", source, False).error.range
+    _, old_t = timeit(lambda: old_extract_offense(r, source), 3)
+    smap, build_t = timeit(lambda: SourceMap(source), 3)
+    _, new_t = timeit(lambda: smap.snippet(r), 3)
+    print(f"lines:               {smap.line_count()}")
+    print(f"old extract_offense: {old_t*1000:.2f}ms")
+    print(f"SourceMap build:     {build_t*1000:.2f}ms (once per file)")
+    print(f"snippet:             {new_t*1000000:.1f}us")
+
+# sem erros, e com um erro a cada 50 linhas
+def bench_recovery(repeat):
+    source = suite_source(repeat)
+    _, parse_t = timeit(lambda: parse("bench", source, False))
+    _, rec_t = timeit(lambda: parse_recovering("bench", source))
+    lines = source.split("\n")
+    i = 0
+    while i < len(lines):
+        if lines[i].strip() != "":
+            lines[i] += " ]"
+        i += 50
+    broken = "\n".join(lines)
+    (tree, errors), broken_t = timeit(lambda: parse_recovering("bench", broken))
+    print(f"parse:               {parse_t*1000:.2f}ms")
+    print(f"recovering:          {rec_t*1000:.2f}ms ({rec_t/parse_t:.2f}x)")
+    print(f"recovering, errors:  {broken_t*1000:.2f}ms ({len(errors)} errors)")
+
+def count_nodes(node):
+    if node == None:
+        return 0
+    out = 0
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        out += 1
+        if n.kind == nodekind.LIST:
+            stack.extend(n.leaves)
+    return out
+
+# tempo de lex, parse e impressao de cada tipo do corpus,
+# em um dicionario que pode ser escrito como JSON
+def bench_phases(size, seed, runs=5):
+    out = {"size": size, "seed": seed, "runs": runs, "corpus": {}}
+    for kind in corpus.KINDS + ["mixed"]:
+        if kind == "mixed":
+            source = corpus.mixed(size, seed)
+        else:
+            source = corpus.generate(kind, size, seed)
+        tokens, lex_t = timeit(lambda: lex("bench", source), runs)
+        res, parse_t = timeit(lambda: parse("bench", source, False), runs)
+        if res.failed():
+            raise ValueError(kind + ": " + res.error.__str__())
+        text, print_t = timeit(lambda: res.value.__str__(), runs)
+        nodes = count_nodes(res.value)
+        _, lex_mem = peak_memory(lambda: lex("bench", source))
+        _, parse_mem = peak_memory(lambda: parse("bench", source, False))
+        _, print_mem = peak_memory(lambda: res.value.__str__())
+        out["corpus"][kind] = {
+            "bytes": len(source),
+            "lines": source.count("\n"),
+            "tokens": len(tokens),
+            "nodes": nodes,
+            "lex_s": lex_t,
+            "parse_s": parse_t,
+            "print_s": print_t,
+            "tokens_per_s": len(tokens) / lex_t,
+            "nodes_per_s": nodes / parse_t,
+            "lex_peak_bytes": lex_mem,
+            "parse_peak_bytes": parse_mem,
+            "print_peak_bytes": print_mem,
+        }
+    return out
+
+# tokens da suite repetida, com e sem a SymbolTable
+def bench_symbols(repeat):
+    source = suite_source(repeat)
+    plain, plain_mem = retained_memory(
+        lambda: FastLexer("bench", source).all_tokens())
+    symbols = SymbolTable()
+    interned, interned_mem = retained_memory(
+        lambda: FastLexer("bench", source, 0, symbols).all_tokens())
+    _, plain_t = timeit(lambda: FastLexer("bench", source).all_tokens())
+    _, interned_t = timeit(
+        lambda: FastLexer("bench", source, 0, SymbolTable()).all_tokens())
+    ids = 0
+    for l in plain:
+        if l.kind == lexkind.ID:
+            ids += 1
+    print(f"ids:             {ids} ({len(symbols)} distinct)")
+    print(f"plain:           {plain_t*1000:.2f}ms {plain_mem/1024:.0f}KiB")
+    print(f"interned:        {interned_t*1000:.2f}ms {interned_mem/1024:.0f}KiB")
+
+def num_lexemes(node):
+    out = []
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        if n.kind == nodekind.LIST:
+            stack.extend(n.leaves)
+        elif n.value.kind == lexkind.NUM:
+            out.append(n.value)
+    return out
+
+# decodificar um por um contra o decode_numbers
+def bench_numbers(repeat):
+    source = corpus.generate("numbers", repeat * 20)
+    res, parse_t = timeit(lambda: parse("bench", source, False))
+    lexemes = num_lexemes(res.value)
+    _, each_t = timeit(lambda: [numeric.decode(l.text) for l in lexemes])
+    _, bulk_t = timeit(lambda: numeric.decode_numbers("bench", res.value))
+    for l in lexemes:
+        numeric.number(l)
+    _, cached_t = timeit(lambda: [numeric.number(l) for l in lexemes])
+    print(f"numbers:             {len(lexemes)}")
+    print(f"parse:               {parse_t*1000:.2f}ms")
+    print(f"decode each:         {each_t*1000:.2f}ms")
+    print(f"decode_numbers:      {bulk_t*1000:.2f}ms")
+    print(f"cached number():     {cached_t*1000:.2f}ms")
+
+# a mesma consulta percorrendo a arvore e pelo KeyIndex
+def bench_query(repeat):
+    source = suite_source(repeat)
+    res = parse("bench", source, False)
+    q = compile_query("editor.statusline mode.insert").value
+    _, walk_t = timeit(lambda: q.find(res.value), 3)
+    index, index_t = timeit(lambda: KeyIndex(res.value), 3)
+    found, find_t = timeit(lambda: q.find(res.value, index), 3)
+    print(f"matches:             {len(found)}")
+    print(f"walk:                {walk_t*1000:.2f}ms")
+    print(f"KeyIndex build:      {index_t*1000:.2f}ms (once per tree)")
+    print(f"indexed:             {find_t*1000:.3f}ms")
+
+# o caminho antigo para o loader: parse e depois uma segunda
+# passada convertendo os Nodes (sem distinguir a.b de [a b])
+def node_to_data(root):
+    out = {}
+    if root != None:
+        for expr in root.leaves:
+            node_entry(out, expr)
+    return out
+
+def node_entry(mapping, expr):
+    if expr.kind == nodekind.TERMINAL:
+        mapping[node_value(expr)] = True
+        return
+    line = expr.leaves[0].range.start.line
+    head = [l for l in expr.leaves if l.range.start.line == line]
+    block = [l for l in expr.leaves if l.range.start.line != line]
+    keys = node_chain(head[0])
+    if len(block) > 0:
+        keys += [node_value(h) for h in head[1:]]
+        value = {}
+        for b in block:
+            node_entry(value, b)
+    elif len(head) == 2:
+        value = node_value(head[1])
+    else:
+        value = [node_value(h) for h in head[1:]]
+    for k in keys[:-1]:
+        inner = mapping.get(k)
+        if not isinstance(inner, dict):
+            inner = {}
+            mapping[k] = inner
+        mapping = inner
+    old = mapping.get(keys[-1])
+    if isinstance(old, dict) and isinstance(value, dict):
+        loader._merge(old, value)
+    else:
+        mapping[keys[-1]] = value
+
+def node_chain(node):
+    if node.kind == nodekind.TERMINAL:
+        return [node_value(node)]
+    return node_chain(node.leaves[0]) + [node_value(node.leaves[1])]
+
+def node_value(node):
+    if node.kind == nodekind.LIST:
+        return [node_value(l) for l in node.leaves]
+    if node.value.kind == lexkind.NUM:
+        return numeric.decode(node.value.text)
+    if node.value.kind == lexkind.ID and node.value.text in ["true", "false", "nil"]:
+        return {"true": True, "false": False, "nil": None}[node.value.text]
+    return node.value.text
+
+# loader.loads contra parse + node_to_data
+def bench_loader(repeat):
+    source = corpus.generate("config", repeat * 20)
+    def convert():
+        return node_to_data(parse("bench", source, False).value)
+    _, old_t = timeit(convert, 3)
+    _, new_t = timeit(lambda: loader.loads("bench", source), 3)
+    _, old_mem = peak_memory(convert)
+    _, new_mem = peak_memory(lambda: loader.loads("bench", source))
+    print(f"parse + convert:     {old_t*1000:.2f}ms {old_mem/1024:.0f}KiB")
+    print(f"loads:               {new_t*1000:.2f}ms {new_mem/1024:.0f}KiB")
+
+# _process_str antigo, um caractere por vez
+def old_process_str(s):
+    out = ""
+    i = 0
+    while i < len(s):
+        r = s[i]
+        if r == "\\":
+            i += 1
+            r = s[i]
+            if r == "n":
+                out += "\n"
+            elif r == "'":
+                out += "'"
+            elif r == "\\":
+                out += "\\"
+        else:
+            out += r
+        i += 1
+    return out
+
+# strings longas, com e sem escapes
+def bench_strings(repeat):
+    plain = "x" * (repeat * 1000)
+    escaped = "ab\\n\\'" * (repeat * 200)
+    for s in [plain, escaped]:
+        _, old_t = timeit(lambda: old_process_str(s), 3)
+        _, new_t = timeit(lambda: _process_str(s), 3)
+        print(f"{len(s)} chars:  old {old_t*1000:.2f}ms  new {new_t*1000:.3f}ms")
+
+    # lexemas guardando o texto contra guardando so os offsets
+    source = corpus.generate("strings", repeat * 20)
+    def copied():
+        out = []
+        for l in FastLexer("bench", source).all_tokens():
+            out.append(Lexeme(l.text, l.kind, l.range))
+        return out
+    _, copied_mem = retained_memory(copied)
+    _, lazy_mem = retained_memory(lambda: FastLexer("bench", source).all_tokens())
+    print(f"source:              {len(source)/1024:.0f}KiB")
+    print(f"copied lexemes:      {copied_mem/1024:.0f}KiB")
+    print(f"source lexemes:      {lazy_mem/1024:.0f}KiB")
+
+# a arvore normal contra a congelada: o suite repetido e um
+# config gerado, que repete bem menos subarvores
+def bench_frozen(repeat):
+    for name, source in [("suite", suite_source(repeat)),
+                         ("config", corpus.generate("config", repeat * 50))]:
+        tree, tree_mem = retained_memory(lambda: parse("bench", source, False))
+        table = HashConsTable()
+        frozen, frozen_mem = retained_memory(lambda: parse_frozen("bench", source, table))
+        # tabela nova: comparada folha a folha
+        other = parse_frozen("bench", source).value
+        _, copy_t = timeit(lambda: tree.value.copy(), 3)
+        _, eq_t = timeit(lambda: frozen.value == other, 3)
+        print(f"{name}:")
+        print(f"  nodes:             {count_nodes(tree.value)}")
+        print(f"  unique nodes:      {len(table)}")
+        print(f"  Node tree:         {tree_mem/1024:.0f}KiB")
+        print(f"  frozen tree:       {frozen_mem/1024:.0f}KiB")
+        print(f"  Node.copy:         {copy_t*1000:.2f}ms")
+        print(f"  == other table:    {eq_t*1000:.3f}ms")
+
+# recarregar um config com uma linha mudada: o diff entre os
+# Snapshots contra comparar o texto de cada entrada
+def bench_diff(repeat):
+    source = corpus.generate("config", repeat * 50)
+    lines = source.split("\n")
+    lines[len(lines) // 2] += " 1"
+    edited = "\n".join(lines)
+    old = parse("bench", source, False)
+    new = parse("bench", edited, False)
+    table = HashConsTable()
+    current = Snapshot(old.value, table, source)
+    _, freeze_t = timeit(lambda: Snapshot(new.value, table), 3)
+    snapshot, reuse_t = timeit(lambda: Snapshot(new.value, table, edited, current), 3)
+    changes, diff_t = timeit(lambda: current.diff(snapshot), 3)
+    def by_text():
+        a = [str(n) for n in old.value.leaves]
+        b = [str(n) for n in new.value.leaves]
+        return [i for i in range(min(len(a), len(b))) if a[i] != b[i]]
+    _, text_t = timeit(by_text, 3)
+    print(f"entries:             {len(new.value.leaves)}")
+    print(f"change:              {changes[0]}")
+    print(f"text per entry:      {text_t*1000:.2f}ms")
+    print(f"Snapshot (new tree): {freeze_t*1000:.2f}ms")
+    print(f"Snapshot (reused):   {reuse_t*1000:.2f}ms")
+    print(f"diff:                {diff_t*1000:.3f}ms")
+
+def retained_memory(fn):
+    tracemalloc.start()
+    out = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, current
+
+if __name__ == "__main__":
+    # python bench.py phases [linhas] [seed]
+    # escreve o resultado em JSON, para comparar execucoes
+    if len(sys.argv) >= 2 and sys.argv[1] == "phases":
+        size = 2000
+        seed = 0
+        if len(sys.argv) >= 3:
+            size = int(sys.argv[2])
+        if len(sys.argv) >= 4:
+            seed = int(sys.argv[3])
+        json.dump(bench_phases(size, seed), sys.stdout, indent=2)
+        print()
+        sys.exit(0)
+    repeat = 200
+    if len(sys.argv) == 2:
+        repeat = int(sys.argv[1])
+    bench_lexer(repeat)
+    bench_stream(repeat)
+    bench_compact(repeat)
+    bench_incremental(repeat)
+    bench_iterative(repeat)
+    bench_cache(repeat)
+    bench_binast(repeat)
+    bench_emit(repeat)
+    bench_ranges(repeat)
+    bench_sourcemap(repeat)
+    bench_recovery(repeat)
+    bench_symbols(repeat)
+    bench_numbers(repeat)
+    bench_query(repeat)
+    bench_loader(repeat)
+    bench_strings(repeat)
+    bench_frozen(repeat)
+    bench_diff(repeat)
@@ -0,0 +1,314 @@
+import sys
+import mmap
+import struct
+from array import array
+import lexkind
+import nodekind
+from core import Node, Lexeme, Position, Range
+from sourcemap import SourceMap
+from symbols import SymbolTable
+
+# formato binario para arvores de core.Node, para guardar
+# documentos ja parseados e abrir sem parsear de novo.
+#
+# Todos os inteiros sao little-endian e sem sinal, de 32 bits:
+#
+#     cabecalho   magic "PULA", versao (u16), flags (u16),
+#                 numero de nos, de strings e de linhas
+#     nos         um registro de _NODE por no, em largura:
+#                 os filhos de uma lista sao sempre contiguos
+#     linhas      offset do inicio de cada linha do codigo fonte
+#     strings     numero_de_strings+1 offsets, e depois o texto
+#                 utf-8 de todas as strings, uma seguida da outra
+#
+# Cada registro de no tem:
+#     flags       _LIST e/ou _HAS_RANGE
+#     lexkind     tipo do lexema (so terminais)
+#     a           numero de filhos (lista) ou indice da string (terminal)
+#     b           indice do primeiro filho (lista)
+#     start, end  offsets no codigo fonte
+#
+# _HAS_RANGE indica que o Node tinha um range quando foi escrito,
+# e entao start/end sao esse range; senao start/end vao do
+# primeiro ao ultimo filho.
+#
+# Os ids dos simbolos nao sao gravados, porque dependem da
+# SymbolTable de quem abre o arquivo: os IDs sao internados em
+# BinaryTree.symbols (a tabela passada para load/loads, ou uma
+# nova) quando alguem pede o symbol de um no ou chama to_node.
+
+_MAGIC = b"PULA"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHIII")
+_NODE = struct.Struct("<BbHIIII")
+
+_LIST = 1
+_HAS_RANGE = 2
+
+def dumps(node, string):
+    source = SourceMap(string)
+    # strings repetidas (ids, principalmente) sao guardadas uma vez so
+    strings = {}
+    texts = []
+
+    order = []
+    if node != None:
+        order.append(node)
+    records = []
+    i = 0
+    while i < len(order):
+        n = order[i]
+        flags = 0
+        if n.range != None:
+            flags |= _HAS_RANGE
+        if n.kind == nodekind.TERMINAL:
+            text = n.value.text
+            index = strings.get(text)
+            if index == None:
+                index = len(texts)
+                strings[text] = index
+                texts.append(text)
+            records.append([flags, n.value.kind, index, 0,
+                            source.offset(n.value.range.start),
+                            source.offset(n.value.range.end)])
+        else:
+            flags |= _LIST
+            records.append([flags, 0, len(n.leaves), len(order), 0, 0])
+            order.extend(n.leaves)
+        i += 1
+
+    # os offsets das listas dependem dos filhos,
+    # que sempre tem indice maior
+    i = len(order) - 1
+    while i >= 0:
+        n = order[i]
+        r = records[i]
+        if r[0] & _HAS_RANGE:
+            r[4] = source.offset(n.range.start)
+            r[5] = source.offset(n.range.end)
+        elif n.kind == nodekind.LIST and r[2] > 0:
+            r[4] = records[r[3]][4]
+            r[5] = records[r[3] + r[2] - 1][5]
+        i -= 1
+
+    out = bytearray(_HEADER.pack(_MAGIC, _VERSION, 0,
+                                 len(records), len(texts), source.line_count()))
+    for r in records:
+        out += _NODE.pack(r[0], r[1], 0, r[2], r[3], r[4], r[5])
+    out += _u32_bytes(source.line_starts)
+
+    blob = bytearray()
+    offsets = [0]
+    for text in texts:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+    out += _u32_bytes(offsets)
+    out += blob
+    return bytes(out)
+
+def dump(node, string, fileobj):
+    fileobj.write(dumps(node, string))
+
+# abre um arquivo escrito com dump, sem ler ele inteiro:
+# o conteudo fica num mmap e os nos sao lidos sob demanda
+def load(path, symbols=None):
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return BinaryTree(buf, symbols)
+
+def loads(data, symbols=None):
+    return BinaryTree(data, symbols)
+
+class BinaryTree:
+    def __init__(self, buf, symbols=None):
+        if symbols == None:
+            symbols = SymbolTable()
+        self.symbols = symbols
+        self.buf = memoryview(buf)
+        magic, version, _, nodes, strings, lines = _HEADER.unpack_from(self.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError("not a binary PULS tree")
+        if version != _VERSION:
+            raise ValueError("unsupported version " + str(version))
+        self.node_count = nodes
+        self.string_count = strings
+        self.nodes_at = _HEADER.size
+        lines_at = self.nodes_at + nodes * _NODE.size
+        offsets_at = lines_at + lines * 4
+        self.blob_at = offsets_at + (strings + 1) * 4
+        self.line_starts = _u32_view(self.buf[lines_at:offsets_at])
+        self.string_offsets = _u32_view(self.buf[offsets_at:self.blob_at])
+        self.strings = {} # strings ja decodificadas
+        self.symbol_ids = {} # indice da string -> id em symbols
+
+    def root(self):
+        if self.node_count == 0:
+            return None
+        return LazyNode(self, 0)
+
+    def record(self, index):
+        return _NODE.unpack_from(self.buf, self.nodes_at + index * _NODE.size)
+
+    def string(self, index):
+        text = self.strings.get(index)
+        if text == None:
+            start = self.blob_at + self.string_offsets[index]
+            end = self.blob_at + self.string_offsets[index+1]
+            text = str(self.buf[start:end], "utf-8")
+            self.strings[index] = text
+        return text
+
+    # id da string de um ID em symbols, internada na primeira vez
+    def symbol(self, index):
+        symbol = self.symbol_ids.get(index)
+        if symbol == None:
+            symbol = self.symbols.intern(self.string(index))
+            self.symbol_ids[index] = symbol
+        return symbol
+
+    def position(self, offset):
+        # bisect_right sobre line_starts
+        lo = 0
+        hi = len(self.line_starts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if offset < self.line_starts[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        line = lo - 1
+        return Position(line, offset - self.line_starts[line])
+
+    def range(self, start, end):
+        return Range(self.position(start), self.position(end))
+
+    # materializa a arvore inteira como core.Node
+    def to_node(self):
+        if self.node_count == 0:
+            return None
+        nodes = [None] * self.node_count
+        # filhos tem indice maior, entao construimos de tras pra frente
+        i = self.node_count - 1
+        while i >= 0:
+            flags, kind, _, a, b, start, end = self.record(i)
+            if flags & _LIST:
+                n = Node(None, nodekind.LIST)
+                n.leaves = nodes[b:b+a]
+            elif kind == lexkind.ID:
+                symbol = self.symbol(a)
+                lexeme = Lexeme(self.symbols.names[symbol], kind,
+                                self.range(start, end), symbol)
+                n = Node(lexeme, nodekind.TERMINAL)
+            else:
+                lexeme = Lexeme(self.string(a), kind, self.range(start, end))
+                n = Node(lexeme, nodekind.TERMINAL)
+            if flags & _HAS_RANGE:
+                n.range = self.range(start, end)
+            nodes[i] = n
+            i -= 1
+        return nodes[0]
+
+# um no do BinaryTree, lido do buffer so quando usado
+class LazyNode:
+    __slots__ = ("tree", "index", "flags", "lexkind", "a", "b", "start", "end")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+        flags, kind, _, a, b, start, end = tree.record(index)
+        self.flags = flags
+        self.lexkind = kind
+        self.a = a
+        self.b = b
+        self.start = start
+        self.end = end
+
+    @property
+    def kind(self):
+        if self.flags & _LIST:
+            return nodekind.LIST
+        return nodekind.TERMINAL
+
+    @property
+    def text(self):
+        if self.flags & _LIST:
+            return None
+        return self.tree.string(self.a)
+
+    # id na BinaryTree.symbols, so para IDs
+    @property
+    def symbol(self):
+        if self.flags & _LIST or self.lexkind != lexkind.ID:
+            return None
+        return self.tree.symbol(self.a)
+
+    @property
+    def leaves(self):
+        if not (self.flags & _LIST):
+            return []
+        out = []
+        i = 0
+        while i < self.a:
+            out.append(LazyNode(self.tree, self.b + i))
+            i += 1
+        return out
+
+    def leaf(self, i):
+        return LazyNode(self.tree, self.b + i)
+
+    def __len__(self):
+        if self.flags & _LIST:
+            return self.a
+        return 0
+
+    def left(self):
+        return self.leaf(0)
+    def right(self):
+        return self.leaf(1)
+
+    def has_lexkind(self, kind):
+        return not (self.flags & _LIST) and self.lexkind == kind
+
+    @property
+    def range(self):
+        return self.tree.range(self.start, self.end)
+
+    # sem recursao: pilha de [no, proxima folha], e cada
+    # folha so eh lida do buffer quando chega a vez dela
+    def __str__(self):
+        if not (self.flags & _LIST):
+            return self.text
+        parts = ["("]
+        stack = [[self, 0]]
+        while len(stack) > 0:
+            frame = stack[-1]
+            node = frame[0]
+            i = frame[1]
+            if i == node.a:
+                parts.append(")")
+                stack.pop()
+                continue
+            frame[1] = i + 1
+            if i > 0:
+                parts.append(" ")
+            leaf = node.leaf(i)
+            if leaf.flags & _LIST:
+                parts.append("(")
+                stack.append([leaf, 0])
+            else:
+                parts.append(leaf.text)
+        return "".join(parts)
+
+def _u32_bytes(values):
+    a = array('I', values)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a.tobytes()
+
+def _u32_view(buf):
+    if sys.byteorder == "little":
+        return buf.cast('I')
+    a = array('I')
+    a.frombytes(buf)
+    a.byteswap()
+    return a
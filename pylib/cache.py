@@ -0,0 +1,230 @@
+import os
+import marshal
+import hashlib
+from array import array
+from collections import OrderedDict
+import lexkind
+import nodekind
+from symbols import SymbolTable
+from core import Result, Node, Error, Lexeme, Position, Range
+from parser import parse, VERSION
+
+# cache em disco dos resultados do parse, indexado pelo hash
+# do codigo fonte e pela versao do parser. Um arquivo que nao
+# mudou eh carregado do cache sem passar pelo Lexer nem pelo _Parser.
+#
+# Cada entrada eh um arquivo <hash>.pc no diretorio do cache,
+# com a arvore serializada em pre-ordem (ver _encode).
+# Quando o diretorio passa de max_size bytes, as entradas
+# usadas ha mais tempo (pelo mtime) sao apagadas.
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# muda quando o formato de _encode muda
+_FORMAT = 1
+_SUFFIX = ".pc"
+
+_TERMINAL = 0
+_LIST = 1
+
+class ParseCache:
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.size = 0
+        # nome -> tamanho, da entrada usada ha mais tempo para a mais recente
+        self.entries = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_SUFFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((st.st_mtime, name, st.st_size))
+        found.sort()
+        for _, name, size in found:
+            self.entries[name] = size
+            self.size += size
+
+    def key(self, string):
+        h = hashlib.sha256()
+        h.update(VERSION.encode("utf-8"))
+        h.update(b"\0")
+        h.update(string.encode("utf-8"))
+        return h.hexdigest()
+
+    # retorna o Result do cache, ou None se nao estiver la
+    def get(self, modname, string):
+        name = self.key(string) + _SUFFIX
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            res = _decode(modname, data)
+        except (OSError, ValueError, EOFError, TypeError, IndexError):
+            return None
+        if res == None:
+            return None
+        if name in self.entries:
+            self.entries.move_to_end(name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return res
+
+    def put(self, string, res):
+        name = self.key(string) + _SUFFIX
+        path = os.path.join(self.directory, name)
+        data = _encode(res)
+        tmp = path + "." + str(os.getpid()) + ".tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        if name in self.entries:
+            self.size -= self.entries[name]
+        self.entries[name] = len(data)
+        self.entries.move_to_end(name)
+        self.size += len(data)
+        self._evict()
+
+    def _evict(self):
+        while self.size > self.max_size and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def parse(self, modname, string):
+        res = self.get(modname, string)
+        if res != None:
+            return res
+        res = parse(modname, string, False)
+        self.put(string, res)
+        return res
+
+# a arvore vira uma lista de inteiros em pre-ordem
+# e uma lista com os textos dos terminais:
+#     terminal: _TERMINAL lexkind <range do lexema> <range do no>
+#     lista:    _LIST numero_de_folhas <range do no>
+# onde <range do no> eh 0, ou 1 seguido de 4 inteiros,
+# porque o range dos nos pode ainda nao ter sido calculado.
+# O Error eh guardado sem o modulo, que depende de quem pede,
+# e a SymbolTable eh refeita no _decode, como no parse.
+def _encode(res):
+    if res.failed():
+        err = res.error
+        ints = array('i')
+        _put_range(ints, err.range)
+        return marshal.dumps((_FORMAT, "error", err.message, ints.tobytes()))
+    if res.value == None:
+        return marshal.dumps((_FORMAT, "empty"))
+
+    ints = array('i')
+    texts = []
+    stack = [res.value]
+    while len(stack) > 0:
+        node = stack.pop()
+        if node.kind == nodekind.TERMINAL:
+            ints.append(_TERMINAL)
+            ints.append(node.value.kind)
+            _put_pos(ints, node.value.range.start)
+            _put_pos(ints, node.value.range.end)
+            texts.append(node.value.text)
+        else:
+            ints.append(_LIST)
+            ints.append(len(node.leaves))
+            i = len(node.leaves) - 1
+            while i >= 0:
+                stack.append(node.leaves[i])
+                i -= 1
+        _put_range(ints, node.range)
+    return marshal.dumps((_FORMAT, "tree", ints.tobytes(), texts))
+
+def _put_pos(ints, pos):
+    ints.append(pos.line)
+    ints.append(pos.column)
+
+def _put_range(ints, range):
+    if range == None:
+        ints.append(0)
+        return
+    ints.append(1)
+    _put_pos(ints, range.start)
+    _put_pos(ints, range.end)
+
+def _decode(modname, data):
+    obj = marshal.loads(data)
+    if obj[0] != _FORMAT:
+        return None
+    symbols = SymbolTable()
+    if obj[1] == "empty":
+        res = Result(None, None)
+        res.symbols = symbols
+        return res
+    if obj[1] == "error":
+        ints = array('i')
+        ints.frombytes(obj[3])
+        range, _ = _get_range(ints, 0)
+        res = Result(None, Error(modname, obj[2], range))
+        res.symbols = symbols
+        return res
+
+    ints = array('i')
+    ints.frombytes(obj[2])
+    texts = obj[3]
+    t = 0
+    i = 0
+    root = None
+    # listas abertas: [no, folhas que faltam]
+    stack = []
+    while i < len(ints):
+        if ints[i] == _TERMINAL:
+            range = Range(Position(ints[i+2], ints[i+3]),
+                          Position(ints[i+4], ints[i+5]))
+            kind = ints[i+1]
+            if kind == lexkind.ID:
+                symbol = symbols.intern(texts[t])
+                lexeme = Lexeme(symbols.names[symbol], kind, range, symbol)
+            else:
+                lexeme = Lexeme(texts[t], kind, range)
+            node = Node(lexeme, nodekind.TERMINAL)
+            t += 1
+            i += 6
+            missing = 0
+        else:
+            node = Node(None, nodekind.LIST)
+            missing = ints[i+1]
+            i += 2
+        node.range, i = _get_range(ints, i)
+
+        if len(stack) == 0:
+            root = node
+        else:
+            stack[-1][0].leaves.append(node)
+            stack[-1][1] -= 1
+        if missing > 0:
+            stack.append([node, missing])
+        while len(stack) > 0 and stack[-1][1] == 0:
+            stack.pop()
+    res = Result(root, None)
+    res.symbols = symbols
+    return res
+
+def _get_range(ints, i):
+    if ints[i] == 0:
+        return None, i+1
+    range = Range(Position(ints[i+1], ints[i+2]),
+                  Position(ints[i+3], ints[i+4]))
+    return range, i+5
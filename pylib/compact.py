@@ -0,0 +1,178 @@
+import lexkind
+import nodekind
+from core import Result, Error, LazyRange, offset_position
+from tokens import tokenize
+from parser import _StreamParser, _parse
+
+# AST compacto, para arvores que ficam muito tempo em memoria.
+# Os nos usam __slots__, as folhas sao tuplas (congeladas)
+# e os ranges sao offsets no codigo fonte. So os Atoms e as
+# S_Exprs guardam onde comecam (o fim vem do tamanho do texto, ou
+# de um tamanho pequeno); as outras Lists vao da primeira a
+# ultima folha.
+# Linha e coluna so sao calculadas quando alguem pede,
+# normalmente ao formatar um Error (ver core.LazyRange).
+# O parser cria os nos compactos direto, entao a arvore de
+# core.Node nunca existe, nem por um momento.
+
+# o texto de um Atom tem o mesmo tamanho que no codigo fonte,
+# menos nas strings (ver StrAtom)
+class Atom:
+    __slots__ = ("lexkind", "text", "start")
+    kind = nodekind.TERMINAL
+    leaves = ()
+
+    def __init__(self, kind, text, start):
+        self.lexkind = kind
+        self.text = text
+        self.start = start
+
+    @property
+    def end(self):
+        return self.start + len(self.text)
+
+    def has_lexkind(self, kind):
+        return self.lexkind == kind
+
+    def __str__(self):
+        return self.text
+
+# STR, que guarda o tamanho com as aspas e os escapes
+class StrAtom(Atom):
+    __slots__ = ("size",)
+
+    def __init__(self, kind, text, start, end):
+        Atom.__init__(self, kind, text, start)
+        self.size = end - start
+
+    @property
+    def end(self):
+        return self.start + self.size
+
+class List:
+    __slots__ = ("leaves",)
+    kind = nodekind.LIST
+
+    def __init__(self, leaves):
+        self.leaves = leaves
+
+    @property
+    def start(self):
+        node = self
+        while type(node) is List:
+            node = node.leaves[0]
+        return node.start
+
+    @property
+    def end(self):
+        node = self
+        while type(node) is List:
+            node = node.leaves[-1]
+        return node.end
+
+    def left(self):
+        return self.leaves[0]
+    def right(self):
+        return self.leaves[1]
+
+    def __str__(self):
+        out = "("
+        i = 0
+        while i < len(self.leaves):
+            if i > 0:
+                out += " "
+            out += self.leaves[i].__str__()
+            i += 1
+        return out + ")"
+
+# ranges de S_Expr incluem os delimitadores,
+# e uma S_Expr pode nao ter folhas
+class SExpr(List):
+    __slots__ = ("offset", "size")
+
+    def __init__(self, leaves, start, end):
+        self.leaves = leaves
+        self.offset = start
+        self.size = end - start
+
+    @property
+    def start(self):
+        return self.offset
+
+    @property
+    def end(self):
+        return self.offset + self.size
+
+# a raiz do documento, junto com o necessario
+# para traduzir offsets em linha/coluna e a SymbolTable
+# dos IDs (os Atoms nao guardam o id, como nao guardam a linha)
+class CompactTree:
+    def __init__(self, modname, root, line_starts, symbols=None):
+        self.modname = modname
+        self.root = root
+        self.line_starts = line_starts
+        self.symbols = symbols
+
+    # id de um Atom ID na SymbolTable, como Lexeme.symbol
+    def symbol(self, node):
+        if self.symbols == None or node.kind != nodekind.TERMINAL or node.lexkind != lexkind.ID:
+            return None
+        return self.symbols.lookup(node.text)
+
+    def position(self, offset):
+        return offset_position(self.line_starts, offset)
+
+    def range(self, node):
+        return LazyRange(self.line_starts, node.start, node.end)
+
+    def error(self, node, message):
+        return Error(self.modname, message, self.range(node))
+
+# symbols eh a SymbolTable dos IDs, ou uma nova,
+# que fica em CompactTree.symbols e Result.symbols
+def parse_compact(modname, string, symbols=None):
+    stream = tokenize(modname, string, symbols)
+    res = _parse(_CompactParser(stream))
+    if res.failed():
+        res.symbols = stream.symbols
+        return res
+    out = Result(CompactTree(modname, res.value, stream.line_starts, stream.symbols), None)
+    out.symbols = stream.symbols
+    return out
+
+# o parser do TokenStream, mas criando Atoms e Lists direto,
+# sem passar por uma arvore de core.Node. Os IDs ja usam a
+# string da SymbolTable; NUMs e STRs repetidos tambem
+# compartilham o texto, por texts
+class _CompactParser(_StreamParser):
+    def __init__(self, stream, hook=None):
+        _StreamParser.__init__(self, stream, hook)
+        self.texts = {}
+
+    def consume(self):
+        if self.word_is(lexkind.INVALID):
+            err = self.error("invalid character")
+            return Result(None, err)
+        i = self.index
+        stream = self.stream
+        kind = self.kinds[i]
+        text = stream.text(i)
+        if kind == lexkind.STR:
+            text = self.texts.setdefault(text, text)
+            n = StrAtom(kind, text, stream.starts[i], stream.ends[i])
+        else:
+            if kind == lexkind.NUM:
+                text = self.texts.setdefault(text, text)
+            n = Atom(kind, text, stream.starts[i])
+        if i < self.last:
+            self.index = i + 1
+        return Result(n, None)
+
+    def new_list(self, leaves):
+        return List(tuple(leaves))
+
+    def new_s_expr(self, leaves, left, right):
+        return SExpr(tuple(leaves), left.start, right.end)
+
+    def start_column(self, node):
+        return offset_position(self.stream.line_starts, node.start).column
@@ -1,15 +1,22 @@
+import io
+from bisect import bisect_right
 import lexkind
 import nodekind
+from emit import write_sexpr
 
 # esse arquivo contem as principais estruturas de dados
 # e suas funcoes utilitarias
 
 class Result:
+    __slots__ = ("value", "error", "symbols")
+
     def __init__(self, value, error):
         #if type(value) is Result:
         #    raise
         self.value = value
         self.error = error
+        # symbols.SymbolTable dos IDs, quando o parse usa uma
+        self.symbols = None
 
     def ok(self):
         return self.error == None
@@ -19,6 +26,8 @@ class Result:
 
 # representa uma posicao no codigo fonte
 class Position:
+    __slots__ = ("line", "column")
+
     def __init__(self, line, column):
         self.line = line
         self.column = column
@@ -54,6 +63,8 @@ class Position:
 # representa uma secao continua do codigo fonte
 # start e end tem que ser da classe Position
 class Range:
+    __slots__ = ("start", "end")
+
     def __init__(self, pos_start, pos_end):
         self.start = pos_start
         self.end = pos_end
@@ -69,6 +80,44 @@ class Range:
         self.start.correct_editor_view()
         self.end.correct_editor_view()
 
+# posicao de um offset, dado o offset onde comeca cada linha
+def offset_position(line_starts, offset):
+    line = bisect_right(line_starts, offset) - 1
+    return Position(line, offset - line_starts[line])
+
+# um Range guardado como dois offsets, que so resolve
+# linha/coluna quando usado (normalmente ao formatar um Error)
+class LazyRange:
+    __slots__ = ("line_starts", "start_offset", "end_offset", "resolved")
+
+    def __init__(self, line_starts, start, end):
+        self.line_starts = line_starts
+        self.start_offset = start
+        self.end_offset = end
+        self.resolved = None
+
+    def resolve(self):
+        if self.resolved == None:
+            self.resolved = Range(offset_position(self.line_starts, self.start_offset),
+                                  offset_position(self.line_starts, self.end_offset))
+            self.line_starts = None
+        return self.resolved
+
+    @property
+    def start(self):
+        return self.resolve().start
+
+    @property
+    def end(self):
+        return self.resolve().end
+
+    def copy(self):
+        return self.resolve().copy()
+    def __str__(self):
+        return self.resolve().__str__()
+    def correct_editor_view(self):
+        self.resolve().correct_editor_view()
+
 class Error:
     def __init__(self, module, string, range):
         self.module = module
@@ -97,11 +146,21 @@ class Error:
         if self.range != None:
             self.range.correct_editor_view()
 
+# symbol eh o id do texto na SymbolTable do parse,
+# so para IDs e quando o lexer usa uma tabela.
+# number eh o valor de um NUM, preenchido por numeric.number;
+# ate la fica UNDECODED, ja que o valor decodificado pode ser None
+UNDECODED = object()
+
 class Lexeme:
-    def __init__(self, string, kind, range):
+    __slots__ = ("text", "kind", "range", "symbol", "number")
+
+    def __init__(self, string, kind, range, symbol=None):
         self.text = string
         self.kind = kind
         self.range = range
+        self.symbol = symbol
+        self.number = UNDECODED
     def __str__(self):
         out = "('" + self.text + "', "
         out += lexkind.to_string(self.kind) + ")"
@@ -109,12 +168,17 @@ class Lexeme:
     def start_column(self):
         return self.range.start.column
     def copy(self):
-        return Lexeme(self.string,
-                      self.kind,
-                      self.range.copy())
+        out = Lexeme(self.text,
+                     self.kind,
+                     self.range.copy(),
+                     self.symbol)
+        out.number = self.number
+        return out
 
 # value precisa ser um Lexeme
 class Node:
+    __slots__ = ("value", "kind", "leaves", "range")
+
     def __init__(self, value, kind):
         self.value = value
         self.kind = kind
@@ -122,7 +186,7 @@ class Node:
         self.range = None
 
     def add_leaf(self, leaf):
-        self.leaves += [leaf]
+        self.leaves.append(leaf)
 
     def left(self):
         return self.leaves[0]
@@ -138,85 +202,57 @@ class Node:
     def start_column(self):
         return self.range.start.column
 
+    # o parser ja cria todos os nos com range, isso so
+    # preenche os ranges que faltam em arvores montadas a mao
     def compute_range(self):
-        if self.kind == nodekind.TERMINAL:
-            self.range = self.value.range.copy()
-            return None
-        if self.range == None:
-            self.range = Range(Position(0, 0),
-                               Position(0, 0))
-        i = 0
-        while i < len(self.leaves):
-            leaf = self.leaves[i]
-
-            if leaf != None:
-                leaf.compute_range()
-                other_start = leaf.range.start
-                self_start = self.range.start
-                if other_start.less(self_start):
-                    self.range.start = other_start.copy()
-                self_end = leaf.range.end
-                other_end = self.range.end
-                if other_end.more(self_end):
-                    self.range.end = other_end.copy()
-            i += 1
+        order = []
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            order.append(node)
+            for leaf in node.leaves:
+                if leaf != None:
+                    stack.append(leaf)
+        # filhos sempre vem depois dos pais em order
+        i = len(order) - 1
+        while i >= 0:
+            node = order[i]
+            i -= 1
+            if node.range != None:
+                continue
+            if node.kind == nodekind.TERMINAL:
+                node.range = node.value.range
+                continue
+            ranges = [leaf.range for leaf in node.leaves
+                      if leaf != None and leaf.range != None]
+            if len(ranges) > 0:
+                node.range = Range(ranges[0].start, ranges[-1].end)
 
     def __str__(self):
-        self.compute_range()
-        out = ""
-        for leaf in self.leaves:
-            out += _print_tree(leaf, 0)
-        return out
+        out = io.StringIO()
+        write_sexpr(self, out)
+        return out.getvalue()
 
+    # copia profunda, sem recursao, como o compute_range
     def copy(self):
-        leaves = []
-        i = 0
-        while i < len(self.leaves):
-            leaf = self.leaves[i]
-
-            leaves += [leaf.copy()]
-            i += 1
-        n = Node(self.value.copy())
-        n.leaves = leaves
-        return n
+        out = self._copy_one()
+        stack = [(self, out)]
+        while len(stack) > 0:
+            node, copy = stack.pop()
+            for leaf in node.leaves:
+                if leaf == None:
+                    copy.leaves.append(None)
+                    continue
+                leaf_copy = leaf._copy_one()
+                copy.leaves.append(leaf_copy)
+                stack.append((leaf, leaf_copy))
+        return out
 
-def _print_tree(node, indent):
-    if node == None:
-        return "nil\n"
-
-    if node.kind == nodekind.TERMINAL:
-        return node.value.text
-
-    if len(node.leaves) == 0:
-        return "()"
-
-    out = ""
-    line = node.range.start.line
-    i = 0
-    broken = False
-    while i < len(node.leaves):
-        n = node.leaves[i]
-        curr_line = n.range.start.line
-        if line < curr_line:
-            out += "\n" + _indent(indent)
-            line = curr_line
-            if not broken:
-                indent += 1
-            broken = True
-        if i == 0:
-            out += "("
-
-        out += _print_tree(n, indent)
-        if i < len(node.leaves)-1:
-            out += " "
-        i += 1
-    out += ")"
-    return out
-
-def _indent(n):
-    i = 0
-    out = ""
-    while i < n:
-        out += "  "
-        i += 1
-    return out
+    def _copy_one(self):
+        value = None
+        if self.value != None:
+            value = self.value.copy()
+        n = Node(value, self.kind)
+        if self.range != None:
+            n.range = self.range.copy()
+        return n
@@ -0,0 +1,190 @@
+import random
+
+# gera documentos PULS sinteticos para o bench. A mesma seed sempre
+# gera o mesmo texto, entao duas execucoes podem ser comparadas.
+#
+#     config    blocos largos e rasos, como suite/config.puls
+#     lisp      S_Exprs profundas, como suite/fact.puls
+#     dots      cadeias longas de pares com '.'
+#     strings   strings com muitos escapes
+#     numbers   literais numericos de todas as formas
+#
+# size eh o numero aproximado de linhas de cada documento.
+
+KINDS = ["config", "lisp", "dots", "strings", "numbers"]
+
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+_OPS = ["+", "-", "*", "/", "<=", ">=", "==", "!=", "and", "or"]
+_WORDS = ["status", "mode", "exec", "bind", "font", "color", "bar",
+          "position", "workspace", "output", "gaps", "border", "focus"]
+
+def generate(kind, size, seed=0):
+    rand = random.Random(kind + ":" + str(seed))
+    if kind == "config":
+        lines = _config(rand, size)
+    elif kind == "lisp":
+        lines = _lisp(rand, size)
+    elif kind == "dots":
+        lines = _dots(rand, size)
+    elif kind == "strings":
+        lines = _strings(rand, size)
+    elif kind == "numbers":
+        lines = _numbers(rand, size)
+    else:
+        raise ValueError("unknown corpus kind: " + kind)
+    return "\n".join(lines) + "\n"
+
+# um documento com todos os tipos, um depois do outro
+def mixed(size, seed=0):
+    out = []
+    for kind in KINDS:
+        out.append(generate(kind, size // len(KINDS), seed))
+    return "\n".join(out)
+
+def _ident(rand):
+    out = rand.choice(_LETTERS)
+    n = rand.randint(0, 8)
+    i = 0
+    while i < n:
+        r = rand.random()
+        if r < 0.8:
+            out += rand.choice(_LETTERS)
+        elif r < 0.9:
+            out += str(rand.randint(0, 9))
+        else:
+            out += rand.choice("-_")
+        i += 1
+    return out
+
+def _number(rand):
+    r = rand.random()
+    if r < 0.4:
+        return str(rand.randint(0, 100000))
+    if r < 0.5:
+        return "~" + str(rand.randint(1, 1000))
+    if r < 0.6:
+        # separador de milhar
+        return "{:_}".format(rand.randint(1000, 10**12))
+    if r < 0.75:
+        return str(rand.randint(0, 999)) + "." + str(rand.randint(0, 10**6))
+    if r < 0.85:
+        return str(rand.randint(1, 99)) + "/" + str(rand.randint(1, 99))
+    if r < 0.95:
+        exp = rand.randint(1, 30)
+        sign = ""
+        if rand.random() < 0.5:
+            sign = "~"
+        return str(rand.randint(1, 9)) + "." + str(rand.randint(0, 999)) + "e" + sign + str(exp)
+    return str(rand.randint(0, 9)) * rand.randint(20, 60)
+
+def _string(rand, escapes):
+    out = "'"
+    n = rand.randint(4, 60)
+    i = 0
+    while i < n:
+        r = rand.random()
+        if r < escapes:
+            out += rand.choice(["\\n", "\\'", "\\\\"])
+        elif r < escapes + 0.15:
+            out += " "
+        else:
+            out += rand.choice(_LETTERS)
+        i += 1
+    return out + "'"
+
+def _config(rand, size):
+    lines = []
+    while len(lines) < size:
+        lines.append(rand.choice(_WORDS) + " " + _ident(rand))
+        n = rand.randint(2, 12)
+        i = 0
+        while i < n:
+            r = rand.random()
+            line = "  " + rand.choice(_WORDS) + "." + _ident(rand) + " "
+            if r < 0.4:
+                line += _string(rand, 0.02)
+            elif r < 0.7:
+                line += _number(rand)
+            else:
+                line += "--" + _ident(rand) + " " + _ident(rand)
+            lines.append(line)
+            if rand.random() < 0.1:
+                lines.append("    " + _ident(rand) + " " + _number(rand))
+            i += 1
+        lines.append("")
+    return lines
+
+def _sexpr(rand, depth):
+    if depth == 0 or rand.random() < 0.2:
+        if rand.random() < 0.6:
+            return _ident(rand)
+        return _number(rand)
+    out = "[" + rand.choice(_OPS)
+    n = rand.randint(1, 3)
+    i = 0
+    while i < n:
+        out += " " + _sexpr(rand, depth - 1)
+        i += 1
+    return out + "]"
+
+def _lisp(rand, size):
+    lines = []
+    while len(lines) < size:
+        name = _ident(rand)
+        lines.append("define [" + name + " n m]")
+        # blocos aninhados por indentacao, com S_Exprs em cada linha
+        indent = 1
+        n = rand.randint(3, 10)
+        i = 0
+        while i < n:
+            lines.append("  " * indent + rand.choice(["if", "let", "do", name]) +
+                         " " + _sexpr(rand, rand.randint(2, 5)))
+            if rand.random() < 0.5 and indent < 12:
+                indent += 1
+            elif indent > 1 and rand.random() < 0.3:
+                indent -= 1
+            i += 1
+        lines.append("")
+    return lines
+
+def _dots(rand, size):
+    lines = []
+    while len(lines) < size:
+        line = _ident(rand)
+        n = rand.randint(10, 60)
+        i = 0
+        while i < n:
+            r = rand.random()
+            if r < 0.7:
+                line += "." + _ident(rand)
+            elif r < 0.85:
+                line += "." + _number(rand)
+            else:
+                line += ".[" + _ident(rand) + " " + _ident(rand) + "]"
+            i += 1
+        lines.append(line)
+    return lines
+
+def _strings(rand, size):
+    lines = []
+    while len(lines) < size:
+        line = _ident(rand)
+        n = rand.randint(1, 4)
+        i = 0
+        while i < n:
+            line += " " + _string(rand, 0.3)
+            i += 1
+        lines.append(line)
+    return lines
+
+def _numbers(rand, size):
+    lines = []
+    while len(lines) < size:
+        line = "[" + _ident(rand)
+        n = rand.randint(4, 16)
+        i = 0
+        while i < n:
+            line += " " + _number(rand)
+            i += 1
+        lines.append(line + "]")
+    return lines
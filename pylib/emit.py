@@ -0,0 +1,149 @@
+import json
+import nodekind
+
+# escreve arvores de core.Node direto num arquivo,
+# em tempo linear e sem montar a saida inteira na memoria.
+#
+# write_sexpr usa o mesmo layout de Node.__str__, quebrando a linha
+# quando uma folha comeca numa linha depois da lista (ver Node.range),
+# write_json escreve listas como arrays e atomos como strings:
+#     f [a b] c   ->   [["f",["a","b"],"c"]]
+
+# pedacos de texto guardados antes de escrever no arquivo
+BUFFER_SIZE = 16 * 1024
+
+# cada entrada da raiz vai numa linha
+def write_sexpr(node, fileobj, buffer_size=BUFFER_SIZE):
+    out = _Buffer(fileobj, buffer_size)
+    i = 0
+    while i < len(node.leaves):
+        if i > 0:
+            out.write("\n")
+        _write_tree(node.leaves[i], out)
+        i += 1
+    out.flush()
+
+def write_json(node, fileobj, buffer_size=BUFFER_SIZE):
+    out = _Buffer(fileobj, buffer_size)
+    if node == None:
+        out.write("[]")
+    else:
+        _write_json(node, out)
+    out.flush()
+
+# junta os pedacos e so escreve no arquivo
+# quando passam de size pedacos
+class _Buffer:
+    def __init__(self, fileobj, size):
+        self.fileobj = fileobj
+        self.size = size
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+        if len(self.parts) >= self.size:
+            self.flush()
+
+    def flush(self):
+        if len(self.parts) > 0:
+            self.fileobj.write("".join(self.parts))
+            self.parts = []
+
+# mesmo layout do antigo _print_tree recursivo, com uma pilha de
+# frames [no, indent, proxima folha, linha atual, ja quebrou a linha]
+def _write_tree(root, out):
+    if root == None:
+        out.write("nil\n")
+        return
+    if root.kind == nodekind.TERMINAL:
+        out.write(root.value.text)
+        return
+    if len(root.leaves) == 0:
+        out.write("()")
+        return
+    if root.range == None:
+        # arvores montadas a mao (Node/add_leaf) ou lidas do binast
+        # podem nao ter ranges
+        root.compute_range()
+
+    parts = out.parts
+    size = out.size
+    indents = [""]
+    stack = [[root, 0, 0, _line(root, 0), False]]
+    while len(stack) > 0:
+        frame = stack[-1]
+        leaves = frame[0].leaves
+        i = frame[2]
+        if i == len(leaves):
+            parts.append(")")
+            stack.pop()
+            if len(stack) > 0:
+                parent = stack[-1]
+                if parent[2] < len(parent[0].leaves) - 1:
+                    parts.append(" ")
+                parent[2] += 1
+            if len(parts) >= size:
+                out.flush()
+                parts = out.parts
+            continue
+
+        n = leaves[i]
+        curr_line = _line(n, frame[3])
+        if frame[3] < curr_line:
+            # a primeira quebra ja aumenta a indentacao, e as
+            # outras linhas da lista ficam nela
+            if not frame[4]:
+                frame[1] += 1
+            frame[4] = True
+            indent = frame[1]
+            while len(indents) <= indent:
+                indents.append(indents[-1] + "  ")
+            parts.append("\n" + indents[indent])
+            frame[3] = curr_line
+        if i == 0:
+            parts.append("(")
+
+        if n == None:
+            parts.append("nil\n")
+        elif n.kind == nodekind.TERMINAL:
+            parts.append(n.value.text)
+        elif len(n.leaves) == 0:
+            parts.append("()")
+        else:
+            stack.append([n, frame[1], 0, _line(n, frame[3]), False])
+            continue
+        if i < len(leaves) - 1:
+            parts.append(" ")
+        frame[2] = i + 1
+
+# um no sem range fica na linha em que esta
+def _line(node, line):
+    if node == None or node.range == None:
+        return line
+    return node.range.start.line
+
+def _write_json(root, out):
+    # pilha de (lista, proxima folha)
+    stack = []
+    node = root
+    while True:
+        if node.kind == nodekind.TERMINAL:
+            out.write(json.dumps(node.value.text))
+        else:
+            out.write("[")
+            stack.append([node, 0])
+
+        node = None
+        while len(stack) > 0:
+            frame = stack[-1]
+            leaves = frame[0].leaves
+            if frame[1] < len(leaves):
+                if frame[1] > 0:
+                    out.write(",")
+                node = leaves[frame[1]]
+                frame[1] += 1
+                break
+            out.write("]")
+            stack.pop()
+        if node == None:
+            return
@@ -0,0 +1,251 @@
+from collections import deque
+import lexkind
+from core import Position, Range, Error
+from lexer import _skip_whitespace, _scan, _process_str
+
+# parser orientado a eventos: percorre a mesma gramatica
+# do parser.py, mas ao inves de construir Nodes emite eventos.
+# A memoria usada so depende da profundidade e do tamanho
+# da linha atual, nao do tamanho do documento.
+#
+# Os eventos sao tuplas:
+#     (START_LIST,)
+#     (END_LIST,)
+#     (ATOM, lexkind, text, offset)
+#     (DOT_PAIR,)          junta os dois ultimos valores, a.b vira [a b]
+#     (ERROR, Error)       sempre o ultimo evento, se existir
+#
+# DOT_PAIR eh posfixo: a.b.c emite a, b, DOT_PAIR, c, DOT_PAIR,
+# ou seja [[a b] c], igual ao _pair.
+
+START_LIST = 0
+END_LIST = 1
+ATOM = 2
+DOT_PAIR = 3
+ERROR = 4
+
+def to_string(kind):
+    if kind == START_LIST:
+        return "START_LIST"
+    elif kind == END_LIST:
+        return "END_LIST"
+    elif kind == ATOM:
+        return "ATOM"
+    elif kind == DOT_PAIR:
+        return "DOT_PAIR"
+    elif kind == ERROR:
+        return "ERROR"
+    return "??"
+
+def iterevents(modname, string):
+    parser = _EventParser(modname, string)
+    err = yield from parser.program()
+    if err != None:
+        yield (ERROR, err)
+
+_ATOMS = (lexkind.ID, lexkind.NUM, lexkind.STR)
+_TERM_BEGIN = (lexkind.ID, lexkind.NUM, lexkind.STR,
+               lexkind.LEFT_DELIM, lexkind.INVALID)
+
+# cada token eh uma tupla (kind, start, end, line, column)
+_KIND = 0
+_START = 1
+_END = 2
+_LINE = 3
+_COLUMN = 4
+
+class _EventParser:
+    def __init__(self, modname, string):
+        self.modname = modname
+        self.string = string
+        self.pos = 0
+        self.line = 0
+        self.line_start = 0
+        self.ahead = deque() # tokens ja lidos depois do atual
+        self.word = self._read()
+
+    def _read(self):
+        start = _skip_whitespace(self.string, self.pos)
+        kind, end = _scan(self.string, start)
+        self.pos = end
+        tk = (kind, start, end, self.line, start - self.line_start)
+        if kind == lexkind.NL:
+            self.line += 1
+            self.line_start = end
+        return tk
+
+    def advance(self):
+        if self.word[_KIND] == lexkind.EOF:
+            return
+        if len(self.ahead) > 0:
+            self.word = self.ahead.popleft()
+        else:
+            self.word = self._read()
+
+    # n = 0 eh o token atual
+    def peek_at(self, n):
+        if n == 0:
+            return self.word
+        while len(self.ahead) < n:
+            if len(self.ahead) > 0:
+                last = self.ahead[-1]
+            else:
+                last = self.word
+            if last[_KIND] == lexkind.EOF:
+                return last
+            self.ahead.append(self._read())
+        return self.ahead[n-1]
+
+    def kind(self):
+        return self.word[_KIND]
+
+    def error(self, str):
+        kind, start, end, line, column = self.word
+        if kind == lexkind.NL:
+            end_pos = Position(line+1, 0)
+        else:
+            end_pos = Position(line, column + end - start)
+        return Error(self.modname, str,
+                     Range(Position(line, column), end_pos))
+
+    def discard_nl(self):
+        while self.kind() == lexkind.NL:
+            self.advance()
+
+    # Program = Block.
+    def program(self):
+        self.discard_nl()
+        if self.kind() != lexkind.EOF:
+            yield (START_LIST,)
+            err = yield from self.block()
+            if err != None:
+                return err
+            yield (END_LIST,)
+        if self.kind() != lexkind.EOF:
+            return self.error("unexpected token or symbol")
+        return None
+
+    # Block = {:I_Expr NL}.
+    # os elementos sao emitidos direto na lista de quem chamou
+    def block(self):
+        base_indent = self.word[_COLUMN]
+        while self.word[_COLUMN] == base_indent and self.kind() != lexkind.EOF:
+            err = yield from self.i_expr()
+            if err != None:
+                return err
+            self.discard_nl()
+        return None
+
+    # I_Expr = Pair {Pair} [NL >Block].
+    def i_expr(self):
+        if not (self.kind() in _TERM_BEGIN):
+            return self.error("unexpected token or symbol")
+
+        # o _i_expr so cria uma lista se houver mais de um elemento,
+        # entao olhamos a frente ate o fim do primeiro Pair
+        n = self._pair_extent()
+        indent = self.word[_COLUMN]
+        is_list = self._continues(n, indent)
+
+        if is_list:
+            yield (START_LIST,)
+        err = yield from self.pair()
+        if err != None:
+            return err
+        while self.kind() in _TERM_BEGIN:
+            err = yield from self.pair()
+            if err != None:
+                return err
+
+        if self.kind() == lexkind.NL:
+            self.discard_nl()
+            if self.word[_COLUMN] > indent and self.kind() != lexkind.EOF:
+                err = yield from self.block()
+                if err != None:
+                    return err
+        if is_list:
+            yield (END_LIST,)
+        return None
+
+    # Pair = Term {'.' Term}.
+    def pair(self):
+        err = yield from self.term()
+        if err != None:
+            return err
+        while self.kind() == lexkind.DOT:
+            self.advance()
+            if not (self.kind() in _TERM_BEGIN):
+                return self.error("expected term")
+            err = yield from self.term()
+            if err != None:
+                return err
+            yield (DOT_PAIR,)
+        return None
+
+    # Term = Atom | S_Expr.
+    def term(self):
+        if self.kind() == lexkind.LEFT_DELIM:
+            err = yield from self.s_expr()
+            return err
+        kind, start, end, _, _ = self.word
+        if kind == lexkind.INVALID:
+            return self.error("invalid character")
+        if kind == lexkind.STR:
+            text = _process_str(self.string[start+1:end-1])
+        else:
+            text = self.string[start:end]
+        yield (ATOM, kind, text, start)
+        self.advance()
+        return None
+
+    # S_Expr = '[' {Pair} ']'.
+    def s_expr(self):
+        self.advance()
+        yield (START_LIST,)
+        while self.kind() in _TERM_BEGIN:
+            err = yield from self.pair()
+            if err != None:
+                return err
+        if self.kind() != lexkind.RIGHT_DELIM:
+            return self.error("expected ]")
+        self.advance()
+        yield (END_LIST,)
+        return None
+
+    # retorna quantos tokens o primeiro Pair ocupa
+    def _pair_extent(self):
+        n = self._term_extent(0)
+        while self.peek_at(n)[_KIND] == lexkind.DOT:
+            n = self._term_extent(n+1)
+        return n
+
+    def _term_extent(self, n):
+        kind = self.peek_at(n)[_KIND]
+        if kind in _ATOMS:
+            return n + 1
+        if kind != lexkind.LEFT_DELIM:
+            return n
+        depth = 0
+        while True:
+            kind = self.peek_at(n)[_KIND]
+            if kind == lexkind.LEFT_DELIM:
+                depth += 1
+            elif kind == lexkind.RIGHT_DELIM:
+                depth -= 1
+                if depth == 0:
+                    return n + 1
+            elif kind in (lexkind.NL, lexkind.EOF, lexkind.INVALID):
+                return n
+            n += 1
+
+    # se depois do primeiro Pair vem outro Pair ou um bloco indentado
+    def _continues(self, n, indent):
+        kind = self.peek_at(n)[_KIND]
+        if kind in _TERM_BEGIN:
+            return True
+        if kind != lexkind.NL:
+            return False
+        while self.peek_at(n)[_KIND] == lexkind.NL:
+            n += 1
+        tk = self.peek_at(n)
+        return tk[_KIND] != lexkind.EOF and tk[_COLUMN] > indent
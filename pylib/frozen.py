@@ -0,0 +1,189 @@
+import nodekind
+from core import Result
+from parser import parse
+
+# arvore congelada com hash-consing: subarvores iguais viram o
+# mesmo objeto, entao um documento com muitos 'mode.normal' ou
+# blocos 'exec' repetidos guarda cada um uma vez so.
+#
+# Cada no guarda o hash da sua estrutura, calculado quando ele eh
+# criado a partir dos hashes das folhas. Dois nos da mesma
+# HashConsTable sao iguais se e so se forem o mesmo objeto; entre
+# tabelas diferentes o hash separa quase todos os casos e so nos
+# com o mesmo hash sao comparados folha a folha.
+# Os nos nunca mudam, entao copy() devolve o proprio no.
+#
+# Como uma subarvore compartilhada aparece em varios lugares do
+# texto, os nos nao tem range. Para reportar erros com posicao
+# use a arvore do parse ou a do compact.
+#
+# O hash usa o hash() do Python, que muda a cada processo:
+# ele serve para comparar em memoria, nao para gravar em disco.
+
+class Frozen:
+    __slots__ = ("kind", "lexkind", "text", "leaves", "hash")
+
+    def __init__(self, kind, lexkind, text, leaves, hash):
+        self.kind = kind
+        self.lexkind = lexkind
+        self.text = text
+        self.leaves = leaves # tupla, None nas folhas vazias
+        self.hash = hash
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Frozen) or self.hash != other.hash:
+            return False
+        return _same(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def copy(self):
+        return self
+
+    def has_lexkind(self, kind):
+        return self.lexkind == kind
+
+    def left(self):
+        return self.leaves[0]
+    def right(self):
+        return self.leaves[1]
+
+    # sem recursao, com uma pilha de [no, proxima folha],
+    # como o emit.write_sexpr
+    def __str__(self):
+        if self.kind == nodekind.TERMINAL:
+            return self.text
+        parts = ["("]
+        stack = [[self, 0]]
+        while len(stack) > 0:
+            frame = stack[-1]
+            leaves = frame[0].leaves
+            i = frame[1]
+            if i == len(leaves):
+                parts.append(")")
+                stack.pop()
+                continue
+            frame[1] = i + 1
+            if i > 0:
+                parts.append(" ")
+            leaf = leaves[i]
+            if leaf == None:
+                parts.append("None")
+            elif leaf.kind == nodekind.TERMINAL:
+                parts.append(leaf.text)
+            else:
+                parts.append("(")
+                stack.append([leaf, 0])
+        return "".join(parts)
+
+# comparacao estrutural, so usada quando os hashes batem.
+# Uma subarvore compartilhada eh comparada uma vez so
+def _same(a, b):
+    stack = [(a, b)]
+    seen = set()
+    while len(stack) > 0:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        pair = (id(a), id(b))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        if a == None or b == None or a.hash != b.hash:
+            return False
+        if a.kind != b.kind or a.lexkind != b.lexkind or a.text != b.text:
+            return False
+        if len(a.leaves) != len(b.leaves):
+            return False
+        i = 0
+        while i < len(a.leaves):
+            stack.append((a.leaves[i], b.leaves[i]))
+            i += 1
+    return True
+
+# tabela dos nos ja criados, pela estrutura. Como na
+# symbols.SymbolTable, pode ser de um parse so ou compartilhada
+# entre varios, e ai os documentos tambem compartilham subarvores.
+class HashConsTable:
+    def __init__(self):
+        self.nodes = {} # estrutura -> Frozen
+        self.hits = 0   # nos que ja existiam
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def terminal(self, kind, text):
+        key = (kind, text)
+        node = self.nodes.get(key)
+        if node == None:
+            node = Frozen(nodekind.TERMINAL, kind, text, (), hash(key))
+            self.nodes[key] = node
+        else:
+            self.hits += 1
+        return node
+
+    # as folhas ja sao da tabela, entao a chave compara
+    # cada folha pelo hash e pela identidade
+    def list(self, leaves):
+        key = tuple(leaves)
+        node = self.nodes.get(key)
+        if node == None:
+            node = Frozen(nodekind.LIST, None, None, key,
+                          hash((nodekind.LIST, key)))
+            self.nodes[key] = node
+        else:
+            self.hits += 1
+        return node
+
+# converte uma arvore de core.Node, das folhas para a raiz
+def freeze(node, table=None):
+    if node == None:
+        return None
+    return freeze_all(node, table)[id(node)]
+
+# como freeze, mas devolve o no congelado de cada subarvore:
+# id(Node) -> Frozen
+def freeze_all(node, table=None):
+    if table == None:
+        table = HashConsTable()
+    frozen = {}
+    if node == None:
+        return frozen
+    order = []
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        order.append(n)
+        for leaf in n.leaves:
+            if leaf != None:
+                stack.append(leaf)
+    # filhos sempre vem depois dos pais em order
+    i = len(order) - 1
+    while i >= 0:
+        n = order[i]
+        i -= 1
+        if n.kind == nodekind.TERMINAL:
+            frozen[id(n)] = table.terminal(n.value.kind, n.value.text)
+            continue
+        leaves = []
+        for leaf in n.leaves:
+            if leaf == None:
+                leaves.append(None)
+            else:
+                leaves.append(frozen[id(leaf)])
+        frozen[id(n)] = table.list(leaves)
+    return frozen
+
+def parse_frozen(modname, string, table=None):
+    res = parse(modname, string, False)
+    if res.failed():
+        return res
+    out = Result(freeze(res.value, table), None)
+    out.symbols = res.symbols
+    return out
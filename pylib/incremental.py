@@ -0,0 +1,194 @@
+import re
+from bisect import bisect_right
+import lexkind
+import nodekind
+from core import Result
+from parser import _list
+from streaming import _parse_record
+from symbols import SymbolTable
+
+# reparse incremental para editores.
+#
+# Quando o documento comeca na coluna 0, cada linha nao vazia na
+# coluna 0 comeca uma nova expressao de topo (um registro), e cada
+# registro pode ser parseado sozinho (ver streaming.iterparse).
+# O Document guarda o offset, a linha e o resultado de cada registro,
+# e uma edicao so reparseia os registros que ela toca; os demais
+# reaproveitam os mesmos Nodes, so com as linhas deslocadas.
+#
+# Todos os registros internam os IDs na mesma SymbolTable, que
+# so cresce: um nome apagado do texto continua nela. Quando ela
+# passa do dobro dos nomes que estavam em uso na ultima contagem,
+# os IDs do documento sao internados de novo numa tabela nova
+# (sem reparsear), entao a tabela fica proporcional ao documento
+# atual. Os ids dos Results devolvidos antes disso mudam junto,
+# como as linhas depois de um edit; use sempre o Result do
+# ultimo edit, com o seu Result.symbols.
+
+# folga antes de recriar a SymbolTable, para documentos
+# pequenos nao recriarem a tabela a cada edit
+_SYMBOLS_SLACK = 1024
+
+# linha com conteudo comecando na coluna 0
+_TOP_LINE = re.compile(r"^[^ \r#\n]", re.M)
+# primeira linha com conteudo, em qualquer coluna
+_CONTENT_LINE = re.compile(r"^[ \r]*[^ \r#\n]", re.M)
+
+class Document:
+    def __init__(self, modname, string):
+        self.modname = modname
+        self.string = string
+        self.starts = []  # offset onde cada registro comeca
+        self.lines = []   # linha onde cada registro comeca
+        self.results = [] # Results de cada registro
+        # compartilhada por todos os reparses do documento
+        self.symbols = SymbolTable()
+        self._replace(0, 0, 0, len(string), 0)
+        self.live_symbols = len(self.symbols) # nomes na ultima contagem
+
+    def result(self):
+        leaves = []
+        for record in self.results:
+            for res in record:
+                if res.failed():
+                    return res
+                leaves.append(res.value)
+        if len(leaves) == 0:
+            res = Result(None, None)
+        else:
+            res = Result(_list(leaves), None)
+        res.symbols = self.symbols
+        return res
+
+    # substitui deleted caracteres a partir de offset por inserted
+    def edit(self, offset, deleted, inserted):
+        old = self.string
+        self.string = old[:offset] + inserted + old[offset+deleted:]
+        delta = len(inserted) - deleted
+        delta_lines = inserted.count("\n") - old.count("\n", offset, offset+deleted)
+
+        # incluimos um registro de cada lado, porque a edicao pode
+        # criar ou desfazer o inicio de uma linha na coluna 0
+        first = bisect_right(self.starts, offset) - 1
+        last = bisect_right(self.starts, offset + deleted) - 1
+        first = max(first - 1, 0)
+        end = min(last + 2, len(self.starts))
+        if first == 0 and not _starts_at_top(self.string):
+            # documento indentado: um registro so
+            end = len(self.starts)
+
+        begin = self.starts[first]
+        if end < len(self.starts):
+            stop = self.starts[end] + delta
+        else:
+            stop = len(self.string)
+
+        i = end
+        while i < len(self.starts):
+            self.starts[i] += delta
+            if delta_lines != 0:
+                self.lines[i] += delta_lines
+                for res in self.results[i]:
+                    _shift_result(res, delta_lines)
+            i += 1
+
+        self._replace(first, end, begin, stop, self.lines[first])
+        if len(self.symbols) > 2 * self.live_symbols + _SYMBOLS_SLACK:
+            self._renumber_symbols()
+        return self.result()
+
+    # interna os IDs de todos os registros numa SymbolTable
+    # nova, que fica so com os nomes ainda em uso
+    def _renumber_symbols(self):
+        symbols = SymbolTable()
+        for record in self.results:
+            for res in record:
+                if res.failed() or res.value == None:
+                    continue
+                stack = [res.value]
+                while len(stack) > 0:
+                    n = stack.pop()
+                    if n.kind == nodekind.LIST:
+                        stack.extend(n.leaves)
+                    elif n.value.kind == lexkind.ID:
+                        n.value.symbol = symbols.intern(n.value.text)
+                res.symbols = symbols
+        self.symbols = symbols
+        self.live_symbols = len(symbols)
+
+    # reparseia self.string[begin:stop], que comeca na linha line,
+    # e coloca os registros encontrados no lugar de [first:end]
+    def _replace(self, first, end, begin, stop, line):
+        starts = _split(self.string, begin, stop)
+        lines = []
+        results = []
+        i = 0
+        while i < len(starts):
+            if i > 0:
+                line += self.string.count("\n", starts[i-1], starts[i])
+            if i+1 < len(starts):
+                record_end = starts[i+1]
+            else:
+                record_end = stop
+            text = self.string[starts[i]:record_end]
+            # num documento indentado o registro unico
+            # pode ter varias expressoes
+            lines.append(line)
+            results.append(_parse_record(self.modname, text, line, self.symbols))
+            i += 1
+
+        self.starts[first:end] = starts
+        self.lines[first:end] = lines
+        self.results[first:end] = results
+
+def parse_document(modname, string):
+    return Document(modname, string)
+
+def _starts_at_top(string):
+    m = _CONTENT_LINE.search(string)
+    return m == None or m.end() - m.start() == 1
+
+# offsets onde comeca cada registro em string[begin:stop]
+def _split(string, begin, stop):
+    starts = [begin]
+    if begin == 0 and not _starts_at_top(string):
+        return starts
+    for m in _TOP_LINE.finditer(string, begin, stop):
+        offset = m.start()
+        if offset == begin:
+            continue
+        # linhas vazias antes da primeira expressao
+        # pertencem ao mesmo registro
+        if _CONTENT_LINE.search(string, starts[-1], offset) == None:
+            continue
+        starts.append(offset)
+    return starts
+
+def _shift_result(res, delta_lines):
+    if res.failed():
+        if res.error.range != None:
+            _shift_range(res.error.range, delta_lines, set())
+        return
+    if res.value != None:
+        _shift_node(res.value, delta_lines)
+
+# os ranges das listas compartilham as Positions das folhas,
+# entao cada Position so pode ser deslocada uma vez
+def _shift_node(node, delta_lines):
+    seen = set()
+    stack = [node]
+    while len(stack) > 0:
+        node = stack.pop()
+        if node.range != None:
+            _shift_range(node.range, delta_lines, seen)
+        if node.kind == nodekind.TERMINAL:
+            _shift_range(node.value.range, delta_lines, seen)
+        else:
+            stack.extend(node.leaves)
+
+def _shift_range(range, delta_lines, seen):
+    for pos in (range.start, range.end):
+        if id(pos) in seen:
+            continue
+        seen.add(id(pos))
+        pos.line += delta_lines
@@ -0,0 +1,85 @@
+import time
+
+# hooks de instrumentacao do parser. Com parse(..., hook=h)
+# o parser chama, para cada producao e cada token:
+#
+#     h.enter(nome, parser)    na entrada da producao
+#     h.exit(nome, parser)     na saida, com ou sem erro
+#     h.token(parser)          antes de consumir um token
+#
+# parser.curr_word() eh o token atual. Sem hook o parser usa
+# a tabela de producoes normal (ver parser._Productions),
+# entao a instrumentacao nao custa nada.
+
+class Hook:
+    def enter(self, name, parser):
+        pass
+
+    def exit(self, name, parser):
+        pass
+
+    def token(self, parser):
+        pass
+
+# o antigo parser.track: imprime cada producao e o token atual
+class TraceHook(Hook):
+    def enter(self, name, parser):
+        print(name + ":" + parser.curr_word().__str__())
+
+# contagem de chamadas, tempo e profundidade de cada producao.
+# O tempo total inclui as producoes chamadas dentro dela,
+# o tempo proprio nao.
+class ProductionStats(Hook):
+    def __init__(self):
+        self.calls = {}
+        self.total_time = {}
+        self.self_time = {}
+        self.tokens = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.elapsed = 0.0
+        # [nome, inicio, tempo das producoes filhas]
+        self.stack = []
+
+    def enter(self, name, parser):
+        self.depth += 1
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self, name, parser):
+        frame = self.stack.pop()
+        t = time.perf_counter() - frame[1]
+        self.depth -= 1
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.total_time[name] = self.total_time.get(name, 0.0) + t
+        self.self_time[name] = self.self_time.get(name, 0.0) + t - frame[2]
+        if len(self.stack) > 0:
+            self.stack[-1][2] += t
+        else:
+            self.elapsed += t
+
+    def token(self, parser):
+        self.tokens += 1
+
+    def tokens_per_second(self):
+        if self.elapsed == 0:
+            return 0.0
+        return self.tokens / self.elapsed
+
+    # uma linha por producao, da que tem mais tempo proprio
+    def rows(self):
+        out = []
+        for name in self.calls:
+            out.append((name, self.calls[name],
+                        self.total_time[name], self.self_time[name]))
+        out.sort(key=lambda row: row[3], reverse=True)
+        return out
+
+    def __str__(self):
+        out = f"{'production':<14}{'calls':>10}{'total ms':>12}{'self ms':>12}\n"
+        for name, calls, total, own in self.rows():
+            out += f"{name:<14}{calls:>10}{total*1000:>12.2f}{own*1000:>12.2f}\n"
+        out += f"tokens: {self.tokens} ({self.tokens_per_second():.0f}/s)\n"
+        out += f"max depth: {self.max_depth}"
+        return out
@@ -1,5 +1,6 @@
+import re
 import lexkind
-from core import Position, Range, Lexeme, Error
+from core import Position, Range, Lexeme, Error, UNDECODED
 
 def _is_ident_begin(s):
     return _is_letter(s) or _is_special(s)
@@ -33,7 +34,7 @@ def _is_bin_digit(s):
     return s in ["0", "1", "_"]
 
 def lex(modname, string):
-    return Lexer(modname, string).all_tokens()
+    return FastLexer(modname, string).all_tokens()
 
 class Lexer:
     def __init__(self, modname, string):
@@ -89,12 +90,14 @@ class Lexer:
         return r
 
     def _emit(self, kind):
+        if kind == lexkind.ID:
+            return SourceLexeme(self.string, self.start,
+                                kind, self.range.copy())
         s = self.string[self.start:self.end]
         return Lexeme(s, kind, self.range.copy())
     def _emit_str(self):
-        s = self.string[self.start+1:self.end-1]
-        s = _process_str(s)
-        return Lexeme(s, lexkind.STR, self.range.copy())
+        return SourceLexeme(self.string, self.start,
+                            lexkind.STR, self.range.copy())
 
     def _advance(self):
         self.start = self.end
@@ -179,12 +182,14 @@ class Lexer:
         return self._emit(lexkind.NUM)
 
     def _num_hex(self):
+        r = self._peek_rune()
         while _is_hex_digit(r):
             self._next_rune()
             r = self._peek_rune()
         return self._emit(lexkind.NUM)
 
     def _num_bin(self):
+        r = self._peek_rune()
         while _is_bin_digit(r):
             self._next_rune()
             r = self._peek_rune()
@@ -231,21 +236,176 @@ class Lexer:
         # remove delimitadores
         return self._emit_str()
 
-def _process_str(s):
-    out = ""
-    i = 0
-    while i < len(s):
-        r = s[i]
-        if r == "\\":
-            i += 1
-            r = s[i]
-            if r == "n":
-                out += "\n"
-            elif r == "'":
-                out += "'"
-            elif r == "\\":
-                out += "\\"
+# tabelas e expressoes regulares do FastLexer,
+# cada uma casa um token inteiro de uma vez so
+_WHITESPACE = re.compile(r"(?:[ \r]+|#[^\n]*)*")
+_WHITESPACE_FIRST = " \r#"
+_INTEGER = r"(?:[0-9][0-9_]*)"
+_NUM = re.compile(r"0x[0-9A-Fa-f_]*|0b[01_]*|"
+                  r"(?:0~?" + _INTEGER + "?|~" + _INTEGER + "?|[1-9][0-9_]*)"
+                  r"(?:[./]" + _INTEGER + "?)?"
+                  r"(?:e~?" + _INTEGER + "?)?")
+_ID = re.compile(r"[a-zA-Z<>?=!\-+*/%$_][a-zA-Z0-9<>?=!\-+*/%$_]*")
+_STR = re.compile(r"'(?:[^'\\\n]|\\[n'\\])*('|\\?)")
+
+_CLASS_NUM = 0
+_CLASS_ID = 1
+_CLASS_STR = 2
+_CLASS_PUNCT = 3
+
+# classe de cada caractere que pode comecar um token,
+# o que nao esta aqui eh INVALID
+_FIRST = {}
+for _c in "0123456789~":
+    _FIRST[_c] = _CLASS_NUM
+for _c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ<>?=!-+*/%$_":
+    _FIRST[_c] = _CLASS_ID
+_FIRST["'"] = _CLASS_STR
+for _c in "[].\n":
+    _FIRST[_c] = _CLASS_PUNCT
+
+_PUNCT_KIND = {
+    "[": lexkind.LEFT_DELIM,
+    "]": lexkind.RIGHT_DELIM,
+    ".": lexkind.DOT,
+    "\n": lexkind.NL,
+}
+
+# mesma interface e mesmos lexemas que o Lexer,
+# mas casa cada token inteiro com uma tabela de classes
+# e uma expressao regular, e calcula linha/coluna
+# por token ao inves de por caractere
+class FastLexer:
+    # line permite lexar um trecho que comeca no meio de um arquivo,
+    # symbols eh uma SymbolTable para os textos dos IDs
+    def __init__(self, modname, string, line=0, symbols=None):
+        self.string = string
+        self.symbols = symbols
+        self.pos = 0
+        self.line = line
+        self.line_start = 0 # offset do inicio da linha atual
+        self.word = None
+        self.peeked = None
+        self.modname = modname
+
+    def next(self):
+        if self.peeked != None:
+            self.word = self.peeked
+            self.peeked = None
         else:
-            out += r
-        i += 1
-    return out
+            self.word = self._any()
+        return self.word
+
+    def peek(self):
+        if self.peeked == None:
+            self.peeked = self._any()
+        return self.peeked
+
+    def all_tokens(self):
+        all = []
+        l = self.next()
+        while not (l.kind in [lexkind.EOF, lexkind.INVALID]):
+            all.append(l)
+            l = self.next()
+        return all
+
+    def _any(self):
+        string = self.string
+        start = _skip_whitespace(string, self.pos)
+        kind, end = _scan(string, start)
+        self.pos = end
+
+        line = self.line
+        column = start - self.line_start
+        if kind == lexkind.NL:
+            self.line = line + 1
+            self.line_start = end
+            return Lexeme("\n", kind, Range(Position(line, column),
+                                            Position(line+1, 0)))
+        range = Range(Position(line, column),
+                      Position(line, column + end - start))
+        if kind == lexkind.ID:
+            symbols = self.symbols
+            if symbols != None:
+                # todas as ocorrencias usam a string da tabela
+                symbol = symbols.intern(string[start:end])
+                return Lexeme(symbols.names[symbol], kind, range, symbol)
+            return SourceLexeme(string, start, kind, range)
+        if kind == lexkind.STR:
+            return SourceLexeme(string, start, kind, range)
+        return Lexeme(string[start:end], kind, range)
+
+def _skip_whitespace(string, pos):
+    if pos < len(string) and string[pos] in _WHITESPACE_FIRST:
+        return _WHITESPACE.match(string, pos).end()
+    return pos
+
+# casa um unico token comecando em start (depois dos espacos)
+# e retorna o tipo e o offset logo apos o token
+def _scan(string, start):
+    if start >= len(string):
+        return lexkind.EOF, start
+    r = string[start]
+    cls = _FIRST.get(r)
+    if cls == _CLASS_PUNCT:
+        return _PUNCT_KIND[r], start + 1
+    elif cls == _CLASS_ID:
+        return lexkind.ID, _ID.match(string, start).end()
+    elif cls == _CLASS_NUM:
+        return lexkind.NUM, _NUM.match(string, start).end()
+    elif cls == _CLASS_STR:
+        m = _STR.match(string, start)
+        if m.group(1) == "'":
+            return lexkind.STR, m.end()
+        return lexkind.INVALID, m.end()
+    return lexkind.INVALID, start + 1
+
+# strings sem '\\' saem como estao, as outras
+# sao decodificadas numa passada so
+def _process_str(s):
+    if not ("\\" in s):
+        return s
+    return _ESCAPE.sub(_unescape, s)
+
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_ESCAPES = {"n": "\n", "'": "'", "\\": "\\"}
+
+def _unescape(m):
+    return _ESCAPES.get(m.group(1), "")
+
+# Lexeme de ID ou STR que so guarda onde o texto comeca no codigo
+# fonte, sem copiar; o tamanho vem do range, porque esses tokens
+# nunca atravessam linhas. O texto eh recortado (e os escapes de STR
+# decodificados) na primeira vez que alguem le lexeme.text, e fica
+# guardado em decoded para as proximas leituras.
+#
+# Com uma SymbolTable os IDs nao passam por aqui: eles ja usam a
+# string da tabela, uma copia por nome e nao por ocorrencia.
+#
+# Cada SourceLexeme mantem o codigo fonte inteiro vivo enquanto
+# existir, entao guardar poucos lexemas de um arquivo grande segura
+# o arquivo todo na memoria. Para guardar um lexema sem o fonte,
+# use lexeme.copy(), que devolve um Lexeme com o texto proprio.
+class SourceLexeme(Lexeme):
+    __slots__ = ("source", "start", "decoded")
+
+    def __init__(self, source, start, kind, range):
+        self.source = source
+        self.start = start
+        self.kind = kind
+        self.range = range
+        self.symbol = None
+        self.number = UNDECODED
+        self.decoded = None
+
+    @property
+    def text(self):
+        out = self.decoded
+        if out == None:
+            end = self.start + self.range.end.column - self.range.start.column
+            if self.kind == lexkind.STR:
+                out = _process_str(self.source[self.start+1:end-1])
+            else:
+                out = self.source[self.start:end]
+            self.decoded = out
+        return out
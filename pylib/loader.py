@@ -0,0 +1,265 @@
+import lexkind
+from core import Result, Error
+from tokens import tokenize
+from lexer import _process_str
+from numeric import _decode, _OUT_OF_RANGE
+
+# le um documento PULS direto para dicts e listas do Python,
+# como o json.loads, sem criar nenhum core.Node:
+# os valores saem direto dos arrays do tokens.TokenStream.
+#
+#     documento, bloco     dict
+#     [a b c]              [a, b, c]
+#     id                   str (true, false e nil viram True, False, None)
+#     str                  str
+#     num                  int, Fraction ou float (ver numeric.decode)
+#     a.b.c                {a: {b: c}}
+#
+# Cada linha de um bloco eh uma entrada do dict. O primeiro Pair
+# da linha eh a chave, e uma chave com '.' cria dicts aninhados:
+#
+#     mode.normal 'NORMAL'      {"mode": {"normal": "NORMAL"}}
+#     exec --x 'ls'             {"exec": ["--x", "ls"]}
+#     age.25                    {"age": 25}
+#     fullscreen                {"fullscreen": True}
+#
+# Quando a linha abre um bloco indentado, todos os atomos da
+# linha fazem parte da chave e o valor eh o dict do bloco:
+#
+#     bindsym Print             {"bindsym": {"Print":
+#       exec 'shot'                 {"exec": "shot"}}}
+#
+# Chaves repetidas juntam os dicts; fora isso o ultimo valor vence.
+
+def loads(modname, string):
+    stream = tokenize(modname, string)
+    return _document(_Loader(stream))
+
+def load(modname, fileobj):
+    return loads(modname, fileobj.read())
+
+_ATOMS = [lexkind.ID, lexkind.NUM, lexkind.STR]
+_TERM_BEGIN = [lexkind.ID, lexkind.NUM, lexkind.STR,
+               lexkind.LEFT_DELIM, lexkind.INVALID]
+_NAMES = {"true": True, "false": False, "nil": None}
+
+class _Loader:
+    def __init__(self, stream):
+        self.stream = stream
+        self.string = stream.string
+        self.kinds = stream.kinds
+        self.starts = stream.starts
+        self.ends = stream.ends
+        self.i = 0
+        self.last = len(stream) - 1
+
+    def word(self):
+        return self.kinds[self.i]
+
+    def next(self):
+        if self.i < self.last:
+            self.i += 1
+
+    def column(self):
+        return self.stream.start_column(self.i)
+
+    def error(self, message, i=None):
+        if i == None:
+            i = self.i
+        return Error(self.stream.modname, message, self.stream.range(i))
+
+    def skip_nl(self):
+        while self.kinds[self.i] == lexkind.NL:
+            self.next()
+
+# Block = {:I_Expr NL}, como parser._iter_block. Cada frame eh
+# um bloco aberto: [base_indent, dict, chave de quem abriu o bloco,
+# indice do primeiro token dessa linha]
+def _document(ld):
+    ld.skip_nl()
+    root = {}
+    stack = [[ld.column(), root, None, 0]]
+    while True:
+        frame = stack[-1]
+        if ld.word() != lexkind.EOF and ld.column() == frame[0]:
+            first = ld.i
+            column = ld.column()
+            res = _pairs(ld)
+            if res.failed():
+                return res
+            pairs = res.value
+            if len(pairs) > 0:
+                if ld.word() == lexkind.NL:
+                    ld.skip_nl()
+                    if ld.column() > column:
+                        res = _block_key(ld, pairs)
+                        if res.failed():
+                            return res
+                        stack.append([ld.column(), {}, res.value, first])
+                        continue
+                res = _entry(ld, frame[1], pairs)
+                if res.failed():
+                    return res
+                ld.skip_nl()
+                continue
+
+        # fim do bloco
+        stack.pop()
+        if len(stack) == 0:
+            if ld.word() != lexkind.EOF:
+                return Result(None, ld.error("unexpected token or symbol"))
+            return Result(root, None)
+        res = _put(ld, stack[-1][1], frame[2], frame[1], frame[3])
+        if res.failed():
+            return res
+        ld.skip_nl()
+
+# uma linha sem bloco: o primeiro Pair eh a chave
+def _entry(ld, mapping, pairs):
+    head = pairs[0]
+    if len(pairs) == 1:
+        if len(head) == 2:
+            return _put(ld, mapping, head[1:], True, head[0])
+        return _put(ld, mapping, head[1:-1], head[-1], head[0])
+
+    values = []
+    for pair in pairs[1:]:
+        v = _pair_value(ld, pair)
+        if isinstance(v, Error):
+            return Result(None, v)
+        values.append(v)
+    if len(values) == 1:
+        return _put(ld, mapping, head[1:], values[0], head[0])
+    return _put(ld, mapping, head[1:], values, head[0])
+
+# uma linha que abre um bloco: a chave eh a linha inteira
+def _block_key(ld, pairs):
+    keys = []
+    for pair in pairs:
+        keys += pair[1:]
+    for k in keys:
+        if isinstance(k, list):
+            return Result(None, ld.error("expected key", pairs[0][0]))
+    return Result(keys, None)
+
+def _put(ld, mapping, keys, value, first):
+    i = 0
+    while i < len(keys):
+        if isinstance(keys[i], list):
+            return Result(None, ld.error("expected key", first))
+        i += 1
+    i = 0
+    while i < len(keys) - 1:
+        k = keys[i]
+        inner = mapping.get(k)
+        if not isinstance(inner, dict):
+            inner = {}
+            mapping[k] = inner
+        mapping = inner
+        i += 1
+    k = keys[-1]
+    old = mapping.get(k)
+    if isinstance(old, dict) and isinstance(value, dict):
+        _merge(old, value)
+    else:
+        mapping[k] = value
+    return Result(None, None)
+
+def _merge(dst, src):
+    stack = [(dst, src)]
+    while len(stack) > 0:
+        dst, src = stack.pop()
+        for k in src:
+            old = dst.get(k)
+            if isinstance(old, dict) and isinstance(src[k], dict):
+                stack.append((old, src[k]))
+            else:
+                dst[k] = src[k]
+
+# a.b.c vira {a: {b: c}}, ou um Error se a ou b for uma lista
+def _pair_value(ld, pair):
+    value = pair[-1]
+    i = len(pair) - 2
+    while i >= 1:
+        k = pair[i]
+        if isinstance(k, list):
+            return ld.error("expected key", pair[0])
+        value = {k: value}
+        i -= 1
+    return value
+
+# {Pair}, como parser._iter_pairs. Cada Pair eh uma lista com o
+# indice do seu primeiro token seguido dos Terms, ja decodificados;
+# uma S_Expr vira a lista dos valores dos seus Pairs.
+def _pairs(ld):
+    kinds = ld.kinds
+    stack = []
+    pairs = []
+    pair = None
+    after_dot = False
+    while True:
+        kind = kinds[ld.i]
+        if after_dot or kind in _TERM_BEGIN:
+            if kind == lexkind.LEFT_DELIM:
+                stack.append((pairs, pair, after_dot, ld.i))
+                ld.next()
+                pairs = []
+                pair = None
+                after_dot = False
+                continue
+            if kind in _ATOMS:
+                res = _atom(ld, kind)
+                if res.failed():
+                    return res
+                term = res.value
+                start = ld.i
+                ld.next()
+            elif kind == lexkind.INVALID:
+                return Result(None, ld.error("invalid character"))
+            else:
+                return Result(None, ld.error("expected term"))
+        elif kind == lexkind.DOT and pair != None:
+            ld.next()
+            after_dot = True
+            continue
+        else:
+            # fim dos Pairs deste nivel
+            if pair != None:
+                pairs.append(pair)
+            if len(stack) == 0:
+                return Result(pairs, None)
+            if kind != lexkind.RIGHT_DELIM:
+                return Result(None, ld.error("expected ]"))
+            ld.next()
+            term = []
+            for p in pairs:
+                v = _pair_value(ld, p)
+                if isinstance(v, Error):
+                    return Result(None, v)
+                term.append(v)
+            pairs, pair, after_dot, start = stack.pop()
+
+        if after_dot:
+            pair.append(term)
+            after_dot = False
+        else:
+            if pair != None:
+                pairs.append(pair)
+            pair = [start, term]
+
+def _atom(ld, kind):
+    start = ld.starts[ld.i]
+    end = ld.ends[ld.i]
+    if kind == lexkind.STR:
+        return Result(_process_str(ld.string[start+1:end-1]), None)
+    text = ld.string[start:end]
+    if kind == lexkind.ID:
+        if text in _NAMES:
+            return Result(_NAMES[text], None)
+        return Result(text, None)
+    value = _decode(text)
+    if value is _OUT_OF_RANGE:
+        return Result(None, ld.error("number out of range"))
+    if value == None:
+        return Result(None, ld.error("invalid number"))
+    return Result(value, None)
@@ -0,0 +1,131 @@
+import re
+import math
+from array import array
+from fractions import Fraction
+import lexkind
+import nodekind
+from core import Result, Error, UNDECODED
+
+# decodifica os literais NUM (ver num no readme):
+#
+#     123  1_000  ~5  0x1F  0b1010   ->  int
+#     22/7  ~1/3  1/2e3              ->  Fraction
+#     3.14  1.6e~10  2e10            ->  float
+#
+# '~' eh o sinal de menos e '_' eh ignorado entre os digitos.
+# Textos que o lexer aceita mas que nao sao numeros completos
+# (como '1.' ou '0x') decodificam para None, assim como floats
+# cujo expoente nao cabe num float (1e400, 1e~400).
+
+_DEC = re.compile(r"(~?)([0-9][0-9_]*)(?:([./])([0-9][0-9_]*))?(?:e(~?)([0-9][0-9_]*))?")
+
+def decode(text):
+    out = _decode(text)
+    if out is _OUT_OF_RANGE:
+        return None
+    return out
+
+# o float do texto virou inf, ou 0.0 com algum digito diferente de 0
+_OUT_OF_RANGE = object()
+
+def _decode(text):
+    if text.isdigit():
+        return int(text)
+    if text.startswith("0x") or text.startswith("0b"):
+        digits = text[2:].replace("_", "")
+        if digits == "":
+            return None
+        if text[1] == "x":
+            return int(digits, 16)
+        return int(digits, 2)
+
+    m = _DEC.fullmatch(text)
+    if m == None:
+        return None
+    neg, integer, sep, rest, exp_neg, exp = m.groups()
+    integer = integer.replace("_", "")
+    if sep == "/":
+        den = int(rest.replace("_", ""))
+        if den == 0:
+            return None
+        out = Fraction(int(integer), den)
+        if exp != None:
+            e = int(exp.replace("_", ""))
+            if exp_neg == "~":
+                out /= 10 ** e
+            else:
+                out *= 10 ** e
+    elif sep == "." or exp != None:
+        s = integer
+        digits = integer
+        if sep == ".":
+            rest = rest.replace("_", "")
+            s += "." + rest
+            digits += rest
+        if exp != None:
+            s += "e"
+            if exp_neg == "~":
+                s += "-"
+            s += exp.replace("_", "")
+        out = float(s)
+        if math.isinf(out):
+            return _OUT_OF_RANGE
+        if out == 0.0 and digits.strip("0") != "":
+            return _OUT_OF_RANGE
+    else:
+        out = int(integer)
+    if neg == "~":
+        return -out
+    return out
+
+# valor de um Lexeme NUM, decodificado so na primeira vez
+# (um texto invalido fica guardado como None)
+def number(lexeme):
+    out = lexeme.number
+    if out is UNDECODED:
+        out = decode(lexeme.text)
+        lexeme.number = out
+    return out
+
+# decodifica todos os NUM da arvore, em pre-ordem, num array
+# do tipo typecode: 'd' converte tudo para float, tipos inteiros
+# so aceitam ints que caibam no array.
+# Retorna um Result com o array, ou o Error do primeiro numero
+# que nao pode ser decodificado.
+def decode_numbers(modname, node, typecode="d"):
+    out = array(typecode)
+    if node == None:
+        return Result(out, None)
+    floats = typecode in ["f", "d"]
+    # textos repetidos sao decodificados uma vez so
+    values = {}
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        if n.kind == nodekind.LIST:
+            stack.extend(reversed(n.leaves))
+            continue
+        if n.value.kind != lexkind.NUM:
+            continue
+        text = n.value.text
+        v = values.get(text)
+        if v == None:
+            v = _decode(text)
+            if v is _OUT_OF_RANGE:
+                return Result(None, Error(modname, "number out of range", n.range))
+            if v == None:
+                return Result(None, Error(modname, "invalid number", n.range))
+            if not (floats or isinstance(v, int)):
+                return Result(None, Error(modname, "expected integer", n.range))
+            if floats:
+                try:
+                    v = float(v)
+                except OverflowError:
+                    # um int ou Fraction com centenas de digitos
+                    return Result(None, Error(modname, "number out of range", n.range))
+            values[text] = v
+        try:
+            out.append(v)
+        except OverflowError:
+            return Result(None, Error(modname, "number out of range", n.range))
+    return Result(out, None)
@@ -1,16 +1,44 @@
 import lexkind
 import nodekind
-from lexer import Lexer
-from core import Result, Node, Error, Range
+from lexer import FastLexer
+from core import Result, Node, Error, Range, LazyRange, offset_position
+from instrument import TraceHook
+from symbols import SymbolTable
+
+# versao das arvores produzidas pelo parser,
+# muda quando a mesma entrada passa a gerar outra arvore
+# (cache.py usa isso para invalidar o cache)
+VERSION = "2"
+
+# hook eh um instrument.Hook, chamado na entrada e saida
+# de cada producao; track=True eh o mesmo que um TraceHook.
+# Os IDs sao internados em symbols, ou numa SymbolTable nova,
+# que fica em Result.symbols
+def parse(modname, string, track, hook=None, symbols=None):
+    if symbols == None:
+        symbols = SymbolTable()
+    parser = _Parser(FastLexer(modname, string, 0, symbols), _hook(track, hook))
+    res = _parse(parser)
+    res.symbols = symbols
+    return res
+
+# parseia direto de um tokens.TokenStream,
+# sem criar um Lexeme por token. Result.symbols eh
+# a SymbolTable do stream
+def parse_stream(stream, track, hook=None):
+    parser = _StreamParser(stream, _hook(track, hook))
+    res = _parse(parser)
+    res.symbols = stream.symbols
+    return res
 
-def parse(modname, string, track):
-    parser = _Parser(Lexer(modname, string))
-    if track:
-        parser.start_tracking()
-    parser.track("parser.parse")
+def _hook(track, hook):
+    if track and hook == None:
+        return TraceHook()
+    return hook
 
+def _parse(parser):
     _discard_nl(parser)
-    res = _block(parser)
+    res = parser.prods.block(parser)
     if res.failed():
         return res
 
@@ -21,12 +49,32 @@ def parse(modname, string, track):
     return res
 
 class _Parser:
-    def __init__(self, lexer):
+    def __init__(self, lexer, hook=None):
         self.lexer = lexer
         self.indent = 0 # numero de espacos
-        self.is_tracking = False
+        self.install(hook)
         lexer.next() # precisamos popular lexer.word
 
+    # as producoes chamam umas as outras por self.prods:
+    # sem hook eh a tabela normal, e o parser nao faz
+    # nenhuma chamada a mais por causa da instrumentacao
+    def install(self, hook):
+        self.hook = hook
+        if hook == None:
+            self.prods = _PLAIN
+            return
+        self.prods = _Productions(lambda name, prod: _instrumented(hook, name, prod))
+        consume = self.consume
+        def counted():
+            hook.token(self)
+            return consume()
+        self.consume = counted
+        skip = self.skip
+        def skipped():
+            hook.token(self)
+            skip()
+        self.skip = skipped
+
     def error(self, str):
         return Error(self.lexer.modname, str, self.lexer.word.range.copy())
 
@@ -37,8 +85,14 @@ class _Parser:
         out = self.lexer.word
         self.lexer.next()
         n = Node(out, nodekind.TERMINAL)
+        n.range = out.range
         return Result(n, None)
 
+    # passa do token atual sem criar um no, para os NLs
+    # que o parser descarta
+    def skip(self):
+        self.lexer.next()
+
     def expect(self, kind, str):
         if self.word_is(kind):
             return self.consume()
@@ -59,8 +113,10 @@ class _Parser:
     def repeat(self, production):
         list = []
         res = production(self)
-        if res.failed() or res.value == None:
+        if res.failed():
             return res
+        if res.value == None:
+            return Result(list, None)
 
         last = res.value
         while last != None:
@@ -72,12 +128,9 @@ class _Parser:
             last = res.value
         return Result(list, None)
 
-    def start_tracking(self):
-        self.is_tracking = True
-
-    def track(self, str):
-        if self.is_tracking:
-            print(str + ":" + self.lexer.word.__str__())
+    # o token atual, para os hooks
+    def curr_word(self):
+        return self.lexer.word
 
     def word_is_one_of(self, kinds):
         return self.lexer.word.kind in kinds
@@ -88,6 +141,22 @@ class _Parser:
     def curr_indent(self):
         return self.lexer.word.start_column()
 
+    # os nos sao criados so por consume e por estes metodos,
+    # entao um parser pode produzir outro tipo de arvore
+    # (ver compact._CompactParser)
+    def new_list(self, leaves):
+        return _list(leaves)
+
+    # left e right sao os terminais de '[' e ']'
+    def new_s_expr(self, leaves, left, right):
+        list = Node(None, nodekind.LIST)
+        list.leaves = leaves
+        list.range = Range(left.range.start, right.range.end)
+        return list
+
+    def start_column(self, node):
+        return node.start_column()
+
     def same_indent(self, base_indent):
         return self.curr_indent() == base_indent and not self.word_is(lexkind.EOF)
 
@@ -105,38 +174,124 @@ class _Parser:
         self.indent = prev_indent
         return Result(out, None)
 
+# mesmo parser, mas lendo os arrays de um TokenStream.
+# Os nos terminais guardam um TokenView ao inves de um Lexeme
+class _StreamParser(_Parser):
+    def __init__(self, stream, hook=None):
+        self.stream = stream
+        self.kinds = stream.kinds
+        self.index = 0
+        self.last = len(stream) - 1
+        self.indent = 0
+        self.install(hook)
+
+    # a linha/coluna do erro so eh calculada quando alguem usa o range
+    def error(self, str):
+        i = self.index
+        stream = self.stream
+        return Error(stream.modname, str,
+                     LazyRange(stream.line_starts, stream.starts[i], stream.ends[i]))
+
+    def consume(self):
+        if self.word_is(lexkind.INVALID):
+            err = self.error("invalid character")
+            return Result(None, err)
+        i = self.index
+        n = _StreamTerminal(self.stream.view(i))
+        if i < self.last:
+            self.index = i + 1
+        return Result(n, None)
+
+    def skip(self):
+        if self.index < self.last:
+            self.index += 1
+
+    # as listas guardam o range como offsets no stream,
+    # do comeco da primeira folha ao fim da ultima
+    def new_list(self, leaves):
+        list = Node(None, nodekind.LIST)
+        list.leaves = leaves
+        list.range = LazyRange(self.stream.line_starts,
+                               self.start_offset(leaves[0]), self.end_offset(leaves[-1]))
+        return list
+
+    def new_s_expr(self, leaves, left, right):
+        list = Node(None, nodekind.LIST)
+        list.leaves = leaves
+        list.range = LazyRange(self.stream.line_starts,
+                               self.start_offset(left), self.end_offset(right))
+        return list
+
+    def start_column(self, node):
+        return offset_position(self.stream.line_starts, self.start_offset(node)).column
+
+    def start_offset(self, node):
+        if node.kind == nodekind.TERMINAL:
+            return self.stream.starts[node.value.index]
+        return node.range.start_offset
+
+    def end_offset(self, node):
+        if node.kind == nodekind.TERMINAL:
+            return self.stream.ends[node.value.index]
+        return node.range.end_offset
+
+    def curr_word(self):
+        return self.stream.view(self.index)
+
+    def word_is_one_of(self, kinds):
+        return self.kinds[self.index] in kinds
+
+    def word_is(self, kind):
+        return self.kinds[self.index] == kind
+
+    def curr_indent(self):
+        return self.stream.start_column(self.index)
+
+# terminal do _StreamParser: o range sai do token no stream
+# so quando alguem usa, entao o parse nao cria um Range por token
+class _StreamTerminal(Node):
+    __slots__ = ()
+
+    def __init__(self, view):
+        self.value = view
+        self.kind = nodekind.TERMINAL
+        self.leaves = []
+
+    @property
+    def range(self):
+        return self.value.range
+
 # Block = {:I_Expr NL}.
 def _block(parser):
-    parser.track("_block")
     leaves = []
 
     base_indent = parser.curr_indent()
     while parser.same_indent(base_indent):
-        res = _i_expr(parser)
+        res = parser.prods.i_expr(parser)
         if res.failed():
             return res
         exp = res.value
+        if exp == None:
+            # nao eh o comeco de uma expressao,
+            # quem chamou decide se eh um erro
+            break
 
         if parser.word_is(lexkind.NL):
-            res = _NL(parser)
+            res = parser.prods.NL(parser)
             if res.failed():
                 return res
 
-        if exp != None:
-            leaves += [exp]
+        leaves += [exp]
 
     if len(leaves) == 0:
         return Result(None, None)
 
-    list = Node(None, nodekind.LIST)
-    list.leaves = leaves
-    return Result(list, None)
+    return Result(parser.new_list(leaves), None)
 
 # I_Expr = Pair {Pair} [NL >Block].
 def _i_expr(parser):
-    parser.track("_i_expr")
 
-    res = parser.repeat(_pair)
+    res = parser.repeat(parser.prods.pair)
     if res.failed():
         return res
     leaves = res.value
@@ -144,13 +299,12 @@ def _i_expr(parser):
         return Result(None, None)
 
     if parser.word_is(lexkind.NL):
-        res = _NL(parser)
+        res = parser.prods.NL(parser)
         if res.failed():
             return res
 
-        leaves[0].compute_range()
-        start_column = leaves[0].start_column()
-        res = parser.indent_prod(start_column, _block)
+        start_column = parser.start_column(leaves[0])
+        res = parser.indent_prod(start_column, parser.prods.block)
         if res.failed():
             return res
         block = res.value
@@ -160,19 +314,16 @@ def _i_expr(parser):
     if len(leaves) == 1:
         return Result(leaves[0], None)
 
-    list = Node(None, nodekind.LIST)
-    list.leaves = leaves
-    return Result(list, None)
+    return Result(parser.new_list(leaves), None)
 
 # Pair = Term {'.' Term}.
 def _pair(parser):
-    parser.track("_pair")
-    res = _term(parser)
+    res = parser.prods.term(parser)
     if res.failed() or res.value == None:
         return res
     first = res.value
 
-    res = parser.repeat(_dot_term)
+    res = parser.repeat(parser.prods.dot_term)
     if res.failed():
         return res
     if res.value != None:
@@ -180,21 +331,18 @@ def _pair(parser):
         root = leaves[0]
         i = 1
         while i < len(leaves):
-            n = Node(None, nodekind.LIST)
-            n.leaves = [root, leaves[i]]
-            root = n
+            root = parser.new_list([root, leaves[i]])
             i += 1
         return Result(root, None)
     return Result(first, None)
 
 # '.' Term
 def _dot_term(parser):
-    parser.track("_dot_term")
     if parser.word_is(lexkind.DOT):
         res = parser.consume()
         if res.failed():
             return res
-        res = parser.expect_prod(_term, "term")
+        res = parser.expect_prod(parser.prods.term, "term")
         if res.failed():
             return res
         return res
@@ -202,21 +350,19 @@ def _dot_term(parser):
 
 # Term = Atom | S_Expr.
 def _term(parser):
-    parser.track("_term")
     if parser.word_is(lexkind.LEFT_DELIM):
-        return _s_expr(parser)
+        return parser.prods.s_expr(parser)
     else:
-        return _atom(parser)
+        return parser.prods.atom(parser)
 
 # S_Expr = '[' {Pair} ']'.
 def _s_expr(parser):
-    parser.track("_s_expr")
     res = parser.expect(lexkind.LEFT_DELIM, "[")
     if res.failed():
         return res
-    left_delim = res.value.value
+    left_delim = res.value
 
-    res = parser.repeat(_pair)
+    res = parser.repeat(parser.prods.pair)
     if res.failed():
         return res
     leafs = res.value
@@ -224,17 +370,12 @@ def _s_expr(parser):
     res = parser.expect(lexkind.RIGHT_DELIM, "]")
     if res.failed():
         return res
-    right_delim = res.value.value
+    right_delim = res.value
 
-    list = Node(None, nodekind.LIST)
-    list.leaves = leafs
-    list.range = Range(left_delim.range.start,
-                       right_delim.range.end)
-    return Result(list, None)
+    return Result(parser.new_s_expr(leafs, left_delim, right_delim), None)
 
 # Atom = id | num | str.
 def _atom(parser):
-    parser.track("_atom")
     if parser.word_is_one_of([lexkind.ID,
                               lexkind.NUM,
                               lexkind.STR]):
@@ -246,13 +387,195 @@ def _atom(parser):
 
 # NL = nl {nl}.
 def _NL(parser):
-    parser.track("_NL")
-    res = parser.expect(lexkind.NL, "line break")
-    if res.failed():
-        return res
+    if not parser.word_is(lexkind.NL):
+        err = parser.error("expected line break")
+        return Result(None, err)
     _discard_nl(parser)
     return Result(None, None)
 
 def _discard_nl(parser):
     while parser.word_is(lexkind.NL):
-        parser.consume()
+        parser.skip()
+
+# lista com o range indo da primeira a ultima folha,
+# assim nenhum range precisa ser calculado depois do parse
+def _list(leaves):
+    list = Node(None, nodekind.LIST)
+    list.leaves = leaves
+    list.range = Range(leaves[0].range.start, leaves[-1].range.end)
+    return list
+
+# parser iterativo: mesma gramatica, mesmas arvores e erros,
+# mas as producoes aninhadas (I_Expr -> Block e S_Expr -> Pair)
+# viram frames numa pilha explicita, entao a profundidade
+# nao depende do limite de recursao do Python.
+def parse_iterative(modname, string, track, hook=None, symbols=None):
+    if symbols == None:
+        symbols = SymbolTable()
+    parser = _Parser(FastLexer(modname, string, 0, symbols), _hook(track, hook))
+    res = _parse_iterative(parser)
+    res.symbols = symbols
+    return res
+
+def parse_stream_iterative(stream, track, hook=None):
+    parser = _StreamParser(stream, _hook(track, hook))
+    res = _parse_iterative(parser)
+    res.symbols = stream.symbols
+    return res
+
+def _parse_iterative(parser):
+    _discard_nl(parser)
+    res = parser.prods.iter_block(parser)
+    if res.failed():
+        return res
+
+    if not parser.word_is(lexkind.EOF):
+        err = parser.error("unexpected token or symbol")
+        return Result(None, err)
+
+    return res
+
+# Block = {:I_Expr NL}.
+# I_Expr = Pair {Pair} [NL >Block].
+# cada frame eh um Block aberto: [base_indent, leaves, pairs],
+# onde pairs sao os Pairs do I_Expr que abriu o bloco
+def _iter_block(parser):
+    stack = [[parser.curr_indent(), [], None]]
+    while True:
+        frame = stack[-1]
+        if parser.same_indent(frame[0]):
+            res = parser.prods.iter_pairs(parser)
+            if res.failed():
+                return res
+            pairs = res.value
+            if len(pairs) > 0:
+                if parser.word_is(lexkind.NL):
+                    res = parser.prods.NL(parser)
+                    if res.failed():
+                        return res
+                    if parser.curr_indent() > parser.start_column(pairs[0]):
+                        stack.append([parser.curr_indent(), [], pairs])
+                        continue
+                res = _iter_end_i_expr(parser, frame[1], pairs)
+                if res.failed():
+                    return res
+                continue
+
+        # fim do bloco
+        stack.pop()
+        leaves = frame[1]
+        if len(stack) == 0:
+            if len(leaves) == 0:
+                return Result(None, None)
+            return Result(parser.new_list(leaves), None)
+
+        pairs = frame[2]
+        pairs += leaves
+        res = _iter_end_i_expr(parser, stack[-1][1], pairs)
+        if res.failed():
+            return res
+
+# fecha um I_Expr e coloca no bloco de quem o contem
+def _iter_end_i_expr(parser, block_leaves, pairs):
+    if len(pairs) == 1:
+        block_leaves.append(pairs[0])
+    else:
+        block_leaves.append(parser.new_list(pairs))
+    if parser.word_is(lexkind.NL):
+        return parser.prods.NL(parser)
+    return Result(None, None)
+
+# {Pair}, com as S_Exprs abertas numa pilha.
+# Cada nivel guarda os Pairs ja completos, o Pair sendo
+# construido e se o ultimo token foi um '.'
+def _iter_pairs(parser):
+    stack = []
+    leaves = []
+    pair = None
+    after_dot = False
+    while True:
+        if after_dot or parser.word_is_one_of(_TERM_BEGIN):
+            if parser.word_is(lexkind.LEFT_DELIM):
+                res = parser.consume()
+                if res.failed():
+                    return res
+                stack.append((leaves, pair, after_dot, res.value))
+                leaves = []
+                pair = None
+                after_dot = False
+                continue
+            if parser.word_is_one_of(_ATOMS):
+                res = parser.consume()
+                if res.failed():
+                    return res
+                term = res.value
+            elif parser.word_is(lexkind.INVALID):
+                err = parser.error("invalid character")
+                return Result(None, err)
+            else:
+                err = parser.error("expected term")
+                return Result(None, err)
+        elif parser.word_is(lexkind.DOT) and pair != None:
+            res = parser.consume()
+            if res.failed():
+                return res
+            after_dot = True
+            continue
+        else:
+            # fim dos Pairs deste nivel
+            if pair != None:
+                leaves.append(pair)
+            if len(stack) == 0:
+                return Result(leaves, None)
+
+            if not parser.word_is(lexkind.RIGHT_DELIM):
+                err = parser.error("expected ]")
+                return Result(None, err)
+            res = parser.consume()
+            if res.failed():
+                return res
+            right_delim = res.value
+            inner = leaves
+            leaves, pair, after_dot, left_delim = stack.pop()
+            term = parser.new_s_expr(inner, left_delim, right_delim)
+
+        # Term completo: continua o Pair atual ou comeca outro
+        if after_dot:
+            pair = parser.new_list([pair, term])
+            after_dot = False
+        else:
+            if pair != None:
+                leaves.append(pair)
+            pair = term
+
+_ATOMS = [lexkind.ID, lexkind.NUM, lexkind.STR]
+_TERM_BEGIN = [lexkind.ID, lexkind.NUM, lexkind.STR,
+               lexkind.LEFT_DELIM, lexkind.INVALID]
+
+# tabela de producoes usada pelo parser, wrap recebe
+# o nome e a funcao de cada producao
+class _Productions:
+    def __init__(self, wrap):
+        self.block = wrap("_block", _block)
+        self.i_expr = wrap("_i_expr", _i_expr)
+        self.pair = wrap("_pair", _pair)
+        self.dot_term = wrap("_dot_term", _dot_term)
+        self.term = wrap("_term", _term)
+        self.s_expr = wrap("_s_expr", _s_expr)
+        self.atom = wrap("_atom", _atom)
+        self.NL = wrap("_NL", _NL)
+        self.iter_block = wrap("_iter_block", _iter_block)
+        self.iter_pairs = wrap("_iter_pairs", _iter_pairs)
+
+# exit eh chamado mesmo quando a producao levanta uma
+# excecao, para o hook nao ficar com a pilha desbalanceada
+def _instrumented(hook, name, production):
+    def run(parser):
+        hook.enter(name, parser)
+        try:
+            return production(parser)
+        finally:
+            hook.exit(name, parser)
+    return run
+
+_PLAIN = _Productions(lambda name, prod: prod)
@@ -0,0 +1,156 @@
+import lexkind
+import nodekind
+from core import Result, Error
+from lexer import _scan
+
+# consultas por caminho em arvores do parser, como
+#
+#     editor.statusline mode.insert
+#
+# Os segmentos sao separados por espacos e cada um eh uma chave:
+# um atomo (id ou num) ou uma cadeia de atomos com '.'.
+# A chave de uma lista eh a cadeia da sua primeira folha, entao
+# 'mode.insert' casa com ((mode insert) INSERT) e 'age' casa com
+# (age 25), que eh como o parser monta age.25.
+# O primeiro segmento casa com listas em qualquer lugar da arvore,
+# os seguintes so com folhas da lista que casou com o anterior.
+# O segmento '*' casa com qualquer lista.
+#
+# compile_query transforma o caminho numa Query uma vez so,
+# e Query.find pode usar um KeyIndex para nao percorrer a arvore.
+
+WILDCARD = ("*",)
+
+class Query:
+    def __init__(self, path, keys):
+        self.path = path
+        self.keys = keys # uma tupla de textos por segmento
+
+    def __str__(self):
+        return self.path
+
+    # todas as listas que casam, em pre-ordem
+    def find(self, root, index=None):
+        if root == None:
+            return []
+        if index != None:
+            return self._find_indexed(index)
+        out = []
+        stack = [(leaf, 0) for leaf in reversed(root.leaves)]
+        last = len(self.keys) - 1
+        while len(stack) > 0:
+            node, depth = stack.pop()
+            if node == None or node.kind != nodekind.LIST:
+                continue
+            matched = _matches(self.keys[depth], node)
+            if matched and depth == last:
+                out.append(node)
+            if matched and depth < last:
+                # os proximos segmentos so olham as folhas
+                for leaf in reversed(node.leaves):
+                    stack.append((leaf, depth + 1))
+            if depth == 0:
+                # o primeiro segmento procura na arvore toda
+                for leaf in reversed(node.leaves):
+                    stack.append((leaf, 0))
+        return out
+
+    def first(self, root, index=None):
+        out = self.find(root, index)
+        if len(out) == 0:
+            return None
+        return out[0]
+
+    # candidatos do ultimo segmento, conferindo os pais
+    def _find_indexed(self, index):
+        last = self.keys[-1]
+        if last == WILDCARD:
+            candidates = index.lists
+        else:
+            candidates = index.lookup(last)
+        if len(self.keys) == 1:
+            return candidates
+        out = []
+        for node in candidates:
+            parent = index.parent(node)
+            i = len(self.keys) - 2
+            while i >= 0 and parent != None and _matches(self.keys[i], parent):
+                parent = index.parent(parent)
+                i -= 1
+            if i < 0:
+                out.append(node)
+        return out
+
+def compile_query(path):
+    keys = []
+    for seg in path.split():
+        key = []
+        for part in seg.split("."):
+            kind, end = _scan(part, 0)
+            if not (kind in [lexkind.ID, lexkind.NUM]) or end != len(part):
+                err = Error("query", "expected id or dotted id: " + seg, None)
+                return Result(None, err)
+            key.append(part)
+        keys.append(tuple(key))
+    if len(keys) == 0:
+        return Result(None, Error("query", "empty path", None))
+    return Result(Query(path, keys), None)
+
+# indice das listas de uma arvore pela chave, feito numa passada.
+# Guarda tambem o pai de cada lista, para as consultas
+# com mais de um segmento.
+class KeyIndex:
+    def __init__(self, root):
+        self.keys = {}    # chave -> listas, em pre-ordem
+        self.parents = {} # id(lista) -> lista pai
+        self.lists = []
+        if root == None:
+            return
+        stack = [(leaf, None) for leaf in reversed(root.leaves)]
+        while len(stack) > 0:
+            node, parent = stack.pop()
+            if node == None or node.kind != nodekind.LIST:
+                continue
+            self.lists.append(node)
+            self.parents[id(node)] = parent
+            key = head_key(node)
+            if key != None:
+                nodes = self.keys.get(key)
+                if nodes == None:
+                    nodes = []
+                    self.keys[key] = nodes
+                nodes.append(node)
+            for leaf in reversed(node.leaves):
+                stack.append((leaf, node))
+
+    def lookup(self, key):
+        return self.keys.get(key, [])
+
+    def parent(self, node):
+        return self.parents.get(id(node))
+
+# textos de uma cadeia a.b.c, que o parser monta como ((a b) c),
+# ou None se o no nao for uma cadeia de atomos
+def chain(node):
+    out = []
+    while node.kind == nodekind.LIST:
+        if len(node.leaves) != 2:
+            return None
+        right = node.leaves[1]
+        if right.kind != nodekind.TERMINAL:
+            return None
+        out.append(right.value.text)
+        node = node.leaves[0]
+    out.append(node.value.text)
+    out.reverse()
+    return tuple(out)
+
+def head_key(node):
+    if len(node.leaves) == 0 or node.leaves[0] == None:
+        return None
+    return chain(node.leaves[0])
+
+def _matches(key, node):
+    if key == WILDCARD:
+        return True
+    return head_key(node) == key
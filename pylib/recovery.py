@@ -0,0 +1,172 @@
+import lexkind
+import nodekind
+from lexer import FastLexer
+from core import Node, Range
+from parser import _Parser, _list, _discard_nl, _ATOMS, _TERM_BEGIN
+
+# parse que nao para no primeiro erro: cada Error vai para uma lista
+# e o parser se ressincroniza no ']' correspondente, quando o erro
+# esta dentro de uma S_Expr, ou na proxima linha com a indentacao
+# de algum bloco aberto. O resultado eh uma arvore parcial, com
+# tudo que foi possivel parsear, e todos os erros em ordem.
+#
+# O primeiro erro eh sempre o mesmo que o parse() retornaria.
+def parse_recovering(modname, string):
+    parser = _Parser(FastLexer(modname, string))
+    errors = []
+    _discard_nl(parser)
+    root = _block(parser, errors)
+    return root, errors
+
+# mesma pilha de blocos do parser._iter_block
+def _block(parser, errors):
+    stack = [[parser.curr_indent(), [], None]]
+    while True:
+        frame = stack[-1]
+        if parser.word_is(lexkind.EOF):
+            break
+        if parser.same_indent(frame[0]):
+            count = len(errors)
+            pairs = _pairs(parser, errors)
+            if len(pairs) == 0:
+                # algo que nao comeca uma expressao, como ']' ou '.',
+                # a nao ser que o _pairs ja tenha reportado
+                if len(errors) == count:
+                    errors.append(parser.error("unexpected token or symbol"))
+                _skip_line(parser)
+                continue
+            if parser.word_is(lexkind.NL):
+                _discard_nl(parser)
+                if parser.curr_indent() > pairs[0].start_column():
+                    stack.append([parser.curr_indent(), [], pairs])
+                    continue
+            _end_i_expr(parser, frame[1], pairs)
+            continue
+
+        if _is_open(stack, parser.curr_indent()):
+            _close(parser, stack)
+            continue
+        # indentacao que nao eh de nenhum bloco aberto,
+        # ou o resto de uma linha que nao terminou
+        errors.append(parser.error("unexpected token or symbol"))
+        _skip_line(parser)
+
+    while len(stack) > 1:
+        _close(parser, stack)
+    leaves = stack[0][1]
+    if len(leaves) == 0:
+        return None
+    return _list(leaves)
+
+def _is_open(stack, indent):
+    for frame in stack:
+        if frame[0] == indent:
+            return True
+    return False
+
+# fecha o bloco do topo e o I_Expr que o abriu
+def _close(parser, stack):
+    frame = stack.pop()
+    pairs = frame[2]
+    pairs += frame[1]
+    _end_i_expr(parser, stack[-1][1], pairs)
+
+def _end_i_expr(parser, block_leaves, pairs):
+    if len(pairs) == 1:
+        block_leaves.append(pairs[0])
+    else:
+        block_leaves.append(_list(pairs))
+    _discard_nl(parser)
+
+# pula ate o fim da linha, inclusive tokens invalidos
+def _skip_line(parser):
+    while not parser.word_is_one_of([lexkind.NL, lexkind.EOF]):
+        parser.lexer.next()
+    _discard_nl(parser)
+
+# {Pair} como no parser._iter_pairs, mas depois de um erro
+# pula ate o ']' da S_Expr aberta ou ate o fim da linha
+def _pairs(parser, errors):
+    stack = []
+    leaves = []
+    pair = None
+    after_dot = False
+    # ja reportamos um erro nesta linha
+    recovering = False
+    while True:
+        term = None
+        if after_dot or parser.word_is_one_of(_TERM_BEGIN):
+            if parser.word_is(lexkind.LEFT_DELIM):
+                left_delim = parser.lexer.word
+                parser.lexer.next()
+                stack.append((leaves, pair, after_dot, left_delim))
+                leaves = []
+                pair = None
+                after_dot = False
+                continue
+            if parser.word_is_one_of(_ATOMS):
+                term = parser.consume().value
+            else:
+                if parser.word_is(lexkind.INVALID):
+                    errors.append(parser.error("invalid character"))
+                else:
+                    errors.append(parser.error("expected term"))
+                recovering = True
+                after_dot = False
+                _skip_to_delim(parser, len(stack) > 0)
+                continue
+        elif parser.word_is(lexkind.DOT) and pair != None:
+            parser.lexer.next()
+            after_dot = True
+            continue
+        else:
+            if pair != None:
+                leaves.append(pair)
+                pair = None
+            if len(stack) == 0:
+                return leaves
+
+            if parser.word_is(lexkind.RIGHT_DELIM):
+                right_delim = parser.lexer.word
+                parser.lexer.next()
+                end = right_delim.range.end
+            elif parser.word_is_one_of([lexkind.NL, lexkind.EOF]):
+                # S_Exprs abertas no fim da linha: fechamos todas
+                if not recovering:
+                    errors.append(parser.error("expected ]"))
+                    recovering = True
+                end = stack[-1][3].range.end
+                if len(leaves) > 0:
+                    end = leaves[-1].range.end
+            else:
+                errors.append(parser.error("expected ]"))
+                recovering = True
+                _skip_to_delim(parser, True)
+                continue
+
+            inner = leaves
+            leaves, pair, after_dot, left_delim = stack.pop()
+            term = Node(None, nodekind.LIST)
+            term.leaves = inner
+            term.range = Range(left_delim.range.start, end)
+
+        if after_dot:
+            pair = _list([pair, term])
+            after_dot = False
+        else:
+            if pair != None:
+                leaves.append(pair)
+            pair = term
+
+# pula tokens ate o ']' que fecha a S_Expr atual
+# (se in_s_expr) ou ate o fim da linha
+def _skip_to_delim(parser, in_s_expr):
+    depth = 0
+    while not parser.word_is_one_of([lexkind.NL, lexkind.EOF]):
+        if parser.word_is(lexkind.LEFT_DELIM):
+            depth += 1
+        elif parser.word_is(lexkind.RIGHT_DELIM):
+            if depth == 0 and in_s_expr:
+                return
+            depth -= 1
+        parser.lexer.next()
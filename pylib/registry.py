@@ -0,0 +1,117 @@
+import os
+import time
+import hashlib
+from core import Result, Error
+from parser import parse
+
+# registro dos modulos .puls de um diretorio, que fica em memoria
+# entre uma varredura e outra (ver 'cli watch').
+#
+# refresh() so faz stat de cada arquivo; um arquivo com o mesmo
+# mtime e tamanho da ultima vez nem eh aberto. Quando um deles
+# muda, o conteudo eh lido e comparado pelo sha256, entao salvar
+# o arquivo sem mudar nada nao causa um novo parse. So os arquivos
+# que mudaram de verdade sao tokenizados e parseados de novo.
+#
+# Cada parse tem a sua SymbolTable (module.result.symbols), entao
+# os nomes de um modulo removido ou reescrito saem da memoria
+# junto com ele, por mais tempo que o registro fique aberto.
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+
+class Module:
+    def __init__(self, path, modname):
+        self.path = path
+        self.modname = modname
+        self.mtime = None
+        self.size = None
+        self.digest = None
+        self.source = None
+        self.result = None # Result do ultimo parse
+        self.seconds = 0.0 # tempo do ultimo parse
+
+    def failed(self):
+        return self.result.failed()
+
+# um modulo que foi parseado de novo, ou removido, num refresh
+class Update:
+    def __init__(self, kind, module):
+        self.kind = kind
+        self.module = module
+
+class ModuleRegistry:
+    def __init__(self, directory):
+        self.directory = directory
+        self.modules = {} # caminho -> Module
+
+    def __len__(self):
+        return len(self.modules)
+
+    # modulos pelo nome, como no get_puls_files
+    def get(self, modname):
+        for module in self.modules.values():
+            if module.modname == modname:
+                return module
+        return None
+
+    # varre o diretorio e reparseia o que mudou desde o ultimo
+    # refresh, retornando os Updates em ordem de caminho
+    def refresh(self):
+        seen = set()
+        out = []
+        for path, st in sorted(_puls_files(self.directory)):
+            seen.add(path)
+            module = self.modules.get(path)
+            kind = CHANGED
+            if module == None:
+                name = os.path.basename(path)
+                module = Module(path, name[:len(name)-5]) # sem ".puls"
+                kind = ADDED
+            elif module.mtime == st.st_mtime_ns and module.size == st.st_size:
+                continue
+            if not self._load(module, st):
+                continue
+            self.modules[path] = module
+            out.append(Update(kind, module))
+        for path in sorted(self.modules):
+            if not (path in seen):
+                out.append(Update(REMOVED, self.modules.pop(path)))
+        return out
+
+    # retorna se o conteudo mudou e o modulo foi parseado
+    def _load(self, module, st):
+        try:
+            with open(module.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            # removido entre o stat e o open
+            return False
+        module.mtime = st.st_mtime_ns
+        module.size = st.st_size
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == module.digest:
+            return False
+        module.digest = digest
+        start = time.perf_counter()
+        try:
+            module.source = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            module.source = None
+            module.result = Result(None, Error(module.path, str(e), None))
+            module.seconds = time.perf_counter() - start
+            return True
+        module.result = parse(module.path, module.source, False)
+        module.seconds = time.perf_counter() - start
+        return True
+
+def _puls_files(directory):
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.endswith(".puls"):
+                path = os.path.join(root, file)
+                try:
+                    yield path, os.stat(path)
+                except OSError:
+                    continue
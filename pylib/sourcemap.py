@@ -0,0 +1,62 @@
+from array import array
+from bisect import bisect_right
+from core import Position, Range
+
+# indice do inicio de cada linha de um arquivo, construido uma vez.
+# Converte offsets em linha/coluna (e vice-versa) por busca binaria,
+# e recorta as linhas de um Range para mostrar em erros,
+# sem precisar percorrer o arquivo de novo.
+class SourceMap:
+    def __init__(self, string):
+        self.string = string
+        self.line_starts = line_starts(string)
+
+    def line_count(self):
+        return len(self.line_starts)
+
+    def offset(self, pos):
+        if pos.line >= len(self.line_starts):
+            return len(self.string)
+        return min(self.line_starts[pos.line] + pos.column, len(self.string))
+
+    def position(self, offset):
+        line = bisect_right(self.line_starts, offset) - 1
+        return Position(line, offset - self.line_starts[line])
+
+    def range(self, start, end):
+        return Range(self.position(start), self.position(end))
+
+    def line_start(self, line):
+        if line >= len(self.line_starts):
+            return len(self.string)
+        return self.line_starts[line]
+
+    # offset do '\n' que termina a linha, ou o fim do arquivo
+    def line_end(self, line):
+        if line+1 >= len(self.line_starts):
+            return len(self.string)
+        return self.line_starts[line+1] - 1
+
+    def line(self, line):
+        return self.string[self.line_start(line):self.line_end(line)]
+
+    # as linhas que o range ocupa, com o range em vermelho
+    def snippet(self, range):
+        line_start = self.line_start(range.start.line)
+        line_end = self.line_end(range.end.line)
+        start = self.offset(range.start)
+        end = max(self.offset(range.end), start)
+        out = self.string[line_start:start]
+        out += "\033[0;31m"
+        out += self.string[start:end]
+        out += "\033[0m"
+        out += self.string[end:line_end]
+        return out
+
+def line_starts(string):
+    out = array('q', [0])
+    i = string.find("\n")
+    while i >= 0:
+        out.append(i+1)
+        i = string.find("\n", i+1)
+    return out
@@ -0,0 +1,110 @@
+from lexer import FastLexer
+from core import Result
+from parser import _Parser, _parse
+from symbols import SymbolTable
+
+# parse incremental de arquivos grandes compostos de varias
+# expressoes de topo (um registro por I_Expr, como num log).
+# Lemos o arquivo em pedacos e cada I_Expr so eh parseada quando
+# a proxima linha na indentacao base (a da primeira linha com
+# conteudo, normalmente a coluna 0) confirma que ela terminou,
+# entao so o registro atual fica em memoria. Um documento todo
+# indentado tambem eh separado, na coluna da primeira linha.
+#
+# Strings e S_Exprs nao atravessam linhas, e um bloco sempre eh
+# mais indentado que o I_Expr que o abre, entao a quebra em linhas
+# eh suficiente para achar o fim de cada registro.
+#
+# Todos os registros usam a mesma SymbolTable (symbols, ou uma nova).
+def iterparse(modname, fileobj, chunk_size=65536, symbols=None):
+    if symbols == None:
+        symbols = SymbolTable()
+    records = RecordSplitter()
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if chunk == "":
+            break
+        for text, line in records.feed(chunk):
+            for res in _parse_record(modname, text, line, symbols):
+                yield res
+                if res.failed():
+                    return
+
+    text, line = records.close()
+    for res in _parse_record(modname, text, line, symbols):
+        yield res
+        if res.failed():
+            return
+
+# separa um texto que chega em pedacos nos registros do iterparse.
+# feed recebe um pedaco e retorna os registros que ele completou,
+# como (texto, linha onde comeca); close retorna o ultimo registro
+class RecordSplitter:
+    def __init__(self):
+        self.record = []      # linhas do registro atual
+        self.record_line = 0  # linha do arquivo onde o registro comeca
+        self.has_expr = False # se o registro ja tem alguma linha nao vazia
+        self.base = None      # coluna da primeira linha com conteudo
+        self.line = 0
+        # pedacos da linha que ainda nao terminou, juntados
+        # so quando chega o '\n', entao uma linha enorme
+        # em pedacos pequenos nao custa tempo quadratico
+        self.tail = []
+
+    def feed(self, chunk):
+        out = []
+        if not ("\n" in chunk):
+            self.tail.append(chunk)
+            return out
+        self.tail.append(chunk)
+        lines = "".join(self.tail).split("\n")
+        self.tail = [lines.pop()]
+
+        for l in lines:
+            indent = _line_indent(l)
+            if indent != None and self.base == None:
+                self.base = indent
+            # uma linha antes da base eh um erro, nao um novo
+            # registro, e fica no registro atual para o parse achar
+            if indent == self.base and self.has_expr:
+                out.append(("\n".join(self.record) + "\n", self.record_line))
+                self.record = []
+                self.record_line = self.line
+                self.has_expr = False
+
+            if indent != None:
+                self.has_expr = True
+            self.record.append(l)
+            self.line += 1
+        return out
+
+    def close(self):
+        self.record.append("".join(self.tail))
+        out = ("\n".join(self.record), self.record_line)
+        self.record = []
+        self.tail = []
+        return out
+
+def _parse_record(modname, text, first_line, symbols=None):
+    res = _parse(_Parser(FastLexer(modname, text, first_line, symbols)))
+    res.symbols = symbols
+    if res.failed():
+        return [res]
+    if res.value == None:
+        return []
+    out = []
+    for leaf in res.value.leaves:
+        leaf_res = Result(leaf, None)
+        leaf_res.symbols = symbols
+        out.append(leaf_res)
+    return out
+
+# coluna do primeiro token da linha,
+# ou None se a linha so tem espacos e comentarios
+def _line_indent(line):
+    i = 0
+    while i < len(line) and line[i] in " \r":
+        i += 1
+    if i == len(line) or line[i] == "#":
+        return None
+    return i
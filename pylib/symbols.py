@@ -0,0 +1,31 @@
+# tabela de simbolos: cada nome de ID recebe um inteiro pequeno,
+# na ordem em que aparece. O FastLexer usa a tabela para que todas
+# as ocorrencias de um nome compartilhem a mesma string, e guarda
+# o id em Lexeme.symbol, entao dois IDs podem ser comparados
+# pelo inteiro ao inves do texto.
+#
+# Uma tabela pode ser de um parse so ou compartilhada entre
+# varios (ver parser.parse e streaming.iterparse).
+class SymbolTable:
+    def __init__(self):
+        self.names = [] # id -> nome
+        self.ids = {}   # nome -> id
+
+    def __len__(self):
+        return len(self.names)
+
+    # retorna o id do nome, criando um se ele for novo
+    def intern(self, name):
+        symbol = self.ids.get(name)
+        if symbol == None:
+            symbol = len(self.names)
+            self.names.append(name)
+            self.ids[name] = symbol
+        return symbol
+
+    # id do nome, ou None se ele nunca apareceu
+    def lookup(self, name):
+        return self.ids.get(name)
+
+    def name(self, symbol):
+        return self.names[symbol]
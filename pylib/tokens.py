@@ -0,0 +1,150 @@
+from array import array
+import lexkind
+from core import Position, Range, Lexeme, UNDECODED, offset_position
+from lexer import _skip_whitespace, _scan, _process_str
+from symbols import SymbolTable
+
+# representacao compacta de uma sequencia de tokens:
+# ao inves de um Lexeme (com Range e duas Positions) por token,
+# guardamos tipo, offsets e linha em arrays paralelos.
+# O ultimo token eh sempre EOF ou INVALID, assim como
+# o parser veria no Lexer.
+# Os IDs sao internados em symbols, como no FastLexer, e o id de
+# cada um fica em ids (-1 nos outros tokens).
+class TokenStream:
+    def __init__(self, modname, string, symbols):
+        self.modname = modname
+        self.string = string
+        self.symbols = symbols
+        self.kinds = array('b')
+        self.ids = array('i')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('q')
+        self.line_starts = array('q', [0]) # offset do inicio de cada linha
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, i):
+        return self.kinds[i]
+
+    def text(self, i):
+        kind = self.kinds[i]
+        if kind == lexkind.ID:
+            return self.symbols.names[self.ids[i]]
+        start = self.starts[i]
+        end = self.ends[i]
+        if kind == lexkind.STR:
+            return _process_str(self.string[start+1:end-1])
+        return self.string[start:end]
+
+    # id do ID na SymbolTable, None nos outros tokens
+    def symbol(self, i):
+        symbol = self.ids[i]
+        if symbol < 0:
+            return None
+        return symbol
+
+    def start_column(self, i):
+        return self.starts[i] - self.line_starts[self.lines[i]]
+
+    def range(self, i):
+        line = self.lines[i]
+        line_start = self.line_starts[line]
+        start = Position(line, self.starts[i] - line_start)
+        if self.kinds[i] == lexkind.NL:
+            return Range(start, Position(line+1, 0))
+        return Range(start, Position(line, self.ends[i] - line_start))
+
+    def position(self, offset):
+        return offset_position(self.line_starts, offset)
+
+    def view(self, i):
+        return TokenView(self, i)
+
+    def lexeme(self, i):
+        return Lexeme(self.text(i), self.kinds[i], self.range(i), self.symbol(i))
+
+    # mesmos lexemas que lexer.lex, sem o EOF/INVALID final
+    def lexemes(self):
+        out = []
+        i = 0
+        while i < len(self.kinds) - 1:
+            out.append(self.lexeme(i))
+            i += 1
+        return out
+
+# symbols eh a SymbolTable dos IDs, ou uma nova
+def tokenize(modname, string, symbols=None):
+    if symbols == None:
+        symbols = SymbolTable()
+    stream = TokenStream(modname, string, symbols)
+    known = symbols.ids
+    kinds = stream.kinds
+    ids = stream.ids
+    starts = stream.starts
+    ends = stream.ends
+    lines = stream.lines
+    line_starts = stream.line_starts
+
+    line = 0
+    pos = 0
+    while True:
+        start = _skip_whitespace(string, pos)
+        kind, pos = _scan(string, start)
+        kinds.append(kind)
+        starts.append(start)
+        ends.append(pos)
+        lines.append(line)
+        if kind == lexkind.ID:
+            word = string[start:pos]
+            symbol = known.get(word)
+            if symbol == None:
+                symbol = symbols.intern(word)
+            ids.append(symbol)
+        else:
+            ids.append(-1)
+        if kind == lexkind.NL:
+            line += 1
+            line_starts.append(pos)
+        elif kind == lexkind.EOF or kind == lexkind.INVALID:
+            return stream
+
+# visao preguicosa de um token do TokenStream,
+# com a mesma interface de um Lexeme.
+# number eh preenchido por numeric.number, como no Lexeme
+class TokenView:
+    __slots__ = ("stream", "index", "number")
+
+    def __init__(self, stream, index):
+        self.stream = stream
+        self.index = index
+        self.number = UNDECODED
+
+    @property
+    def text(self):
+        return self.stream.text(self.index)
+
+    @property
+    def kind(self):
+        return self.stream.kinds[self.index]
+
+    @property
+    def symbol(self):
+        return self.stream.symbol(self.index)
+
+    @property
+    def range(self):
+        return self.stream.range(self.index)
+
+    def start_column(self):
+        return self.stream.start_column(self.index)
+
+    def __str__(self):
+        out = "('" + self.text + "', "
+        out += lexkind.to_string(self.kind) + ")"
+        return out
+
+    def copy(self):
+        return self.stream.lexeme(self.index)
@@ -0,0 +1,254 @@
+import nodekind
+from frozen import HashConsTable, freeze_all
+from query import head_key
+from incremental import _split
+
+# diff estrutural entre duas versoes de um documento, para
+# recarregar um config so no que mudou.
+#
+# Cada subarvore recebe um no congelado (ver frozen), e com a
+# mesma HashConsTable nos dois lados subarvores iguais viram o
+# mesmo objeto: o diff pula cada uma com um 'is', sem descer nela.
+#
+# As entradas de um bloco sao casadas pela chave, a cadeia de
+# atomos da primeira folha (query.head_key), e chaves repetidas
+# sao casadas na ordem em que aparecem. Uma entrada que mudou e
+# cujo conteudo tambem eh um bloco de entradas com chave, como
+#
+#     editor.statusline
+#       mode.normal 'NORMAL'
+#
+# eh comparada entrada por entrada, entao o Change fica no caminho
+# mais fundo possivel ("editor.statusline mode.normal").
+#
+# Entradas iguais sao casadas primeiro pelo no congelado, num
+# dicionario, e so as que sobram sao casadas pela chave.
+#
+# Congelar a arvore inteira custa O(arquivo) a cada recarga. Com o
+# codigo fonte, o Snapshot separa o documento em registros (como o
+# incremental.Document) e uma entrada cujo texto ja estava no
+# Snapshot anterior reaproveita o no congelado dele, sem congelar
+# nada. As subarvores das entradas so sao congeladas quando o diff
+# desce nelas, entao recarregar custa o parse mais as entradas que
+# mudaram:
+#
+#     table = HashConsTable()
+#     current = Snapshot(res.value, table, source)
+#     ...
+#     new = Snapshot(parse("m", text, False).value, table, text, current)
+#     changes = current.diff(new)
+#     current = new
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+class Change:
+    def __init__(self, kind, keys, old, new):
+        self.kind = kind
+        self.keys = keys # uma tupla de textos por nivel
+        self.old = old   # core.Node, None em ADDED
+        self.new = new   # core.Node, None em REMOVED
+
+    # o caminho no formato do query.compile_query
+    def path(self):
+        return " ".join([".".join(key) for key in self.keys])
+
+    def __str__(self):
+        return self.kind + " " + self.path()
+
+# uma arvore de core.Node junto com os nos congelados das
+# subarvores. source eh o texto de root, e previous um Snapshot
+# anterior com a mesma table, para reaproveitar as entradas
+class Snapshot:
+    def __init__(self, root, table=None, source=None, previous=None):
+        if table == None:
+            table = HashConsTable()
+        self.root = root
+        self.table = table
+        self.frozen = {} # id(Node) -> Frozen, preenchido sob demanda
+        self.records = {} # texto do registro -> Frozen da entrada
+        if root == None:
+            return
+        texts = _record_texts(root, source)
+        reused = {}
+        if previous != None and previous.table is table:
+            reused = previous.records
+        entries = []
+        i = 0
+        while i < len(root.leaves):
+            node = root.leaves[i]
+            text = None
+            if texts != None:
+                text = texts[i]
+            frozen = reused.get(text)
+            if frozen == None:
+                frozen = self.freeze(node)
+            else:
+                self.frozen[id(node)] = frozen
+            if text != None:
+                self.records[text] = frozen
+            entries.append(frozen)
+            i += 1
+        self.frozen[id(root)] = table.list(entries)
+
+    # no congelado de uma subarvore de root
+    def freeze(self, node):
+        out = self.frozen.get(id(node))
+        if out == None:
+            self.frozen.update(freeze_all(node, self.table))
+            out = self.frozen[id(node)]
+        return out
+
+    def diff(self, new):
+        return _diff(self, new)
+
+# o texto de cada entrada da raiz, ou None quando os
+# registros do codigo fonte nao batem com as entradas
+def _record_texts(root, source):
+    if source == None:
+        return None
+    starts = _split(source, 0, len(source))
+    if len(starts) != len(root.leaves):
+        return None
+    out = []
+    i = 0
+    while i < len(starts):
+        if i+1 < len(starts):
+            out.append(source[starts[i]:starts[i+1]])
+        else:
+            out.append(source[starts[i]:])
+        i += 1
+    return out
+
+def diff(old, new, table=None):
+    if table == None:
+        table = HashConsTable()
+    return Snapshot(old, table).diff(Snapshot(new, table))
+
+def _diff(old, new):
+    out = []
+    if _same(old, old.root, new, new.root):
+        return out
+    # um frame por bloco aberto: (chaves ate aqui, pares a comparar),
+    # para os Changes sairem na ordem do documento
+    stack = [((), iter(_match(old, _entries(old.root), new, _entries(new.root))))]
+    while len(stack) > 0:
+        keys, pairs = stack[-1]
+        pair = next(pairs, None)
+        if pair == None:
+            stack.pop()
+            continue
+        key, a, b = pair
+        path = keys + (key,)
+        if b == None:
+            out.append(Change(REMOVED, path, a, None))
+        elif a == None:
+            out.append(Change(ADDED, path, None, b))
+        elif _same(old, a, new, b):
+            continue
+        elif _is_block(a) and _is_block(b):
+            stack.append((path, iter(_match(old, a.leaves[1:], new, b.leaves[1:]))))
+        else:
+            out.append(Change(MODIFIED, path, a, b))
+    return out
+
+def _same(old, a, new, b):
+    if a == None or b == None:
+        return a is b
+    return old.freeze(a) == new.freeze(b)
+
+def _entries(root):
+    if root == None:
+        return []
+    return root.leaves
+
+# entradas sem chave, como '[a b] c', tem a chave ()
+def _key(node):
+    if node == None:
+        return ()
+    if node.kind == nodekind.TERMINAL:
+        return (node.value.text,)
+    key = head_key(node)
+    if key == None:
+        return ()
+    return key
+
+# um I_Expr cujo conteudo depois da chave sao entradas com chave
+def _is_block(node):
+    if node == None or node.kind != nodekind.LIST or len(node.leaves) < 2:
+        return False
+    if head_key(node) == None:
+        return False
+    for leaf in node.leaves[1:]:
+        if leaf == None or leaf.kind != nodekind.LIST or head_key(leaf) == None:
+            return False
+    return True
+
+# trincas (chave, antiga, nova) na ordem das entradas antigas,
+# depois as novas que sobraram.
+# Primeiro as entradas iguais, pelo no congelado (com a mesma
+# HashConsTable, entradas iguais sao o mesmo Frozen); as outras
+# sao casadas pela chave, na ordem em que aparecem
+def _match(old, old_entries, new, new_entries):
+    same = {} # Frozen -> entradas novas com ele, em ordem
+    for node in new_entries:
+        if node == None:
+            continue
+        frozen = new.freeze(node)
+        nodes = same.get(frozen)
+        if nodes == None:
+            nodes = []
+            same[frozen] = nodes
+        nodes.append(node)
+    pairs = {} # id(antiga) -> nova igual
+    matched = set() # id das novas ja casadas
+    taken = {} # Frozen -> quantas novas iguais ja foram casadas
+    for node in old_entries:
+        if node == None:
+            continue
+        frozen = old.freeze(node)
+        nodes = same.get(frozen)
+        n = taken.get(frozen, 0)
+        if nodes != None and n < len(nodes):
+            pairs[id(node)] = nodes[n]
+            matched.add(id(nodes[n]))
+            taken[frozen] = n + 1
+
+    by_key = {}
+    for node in new_entries:
+        if id(node) in matched:
+            continue
+        key = _key(node)
+        nodes = by_key.get(key)
+        if nodes == None:
+            nodes = []
+            by_key[key] = nodes
+        nodes.append(node)
+    used = {} # chave -> quantas novas ja foram casadas
+    out = []
+    for node in old_entries:
+        b = pairs.get(id(node))
+        if b != None:
+            # igual, so para o diff pular
+            out.append(((), node, b))
+            continue
+        key = _key(node)
+        n = used.get(key, 0)
+        nodes = by_key.get(key, [])
+        if n < len(nodes):
+            out.append((key, node, nodes[n]))
+            used[key] = n + 1
+        else:
+            out.append((key, node, None))
+    # as novas que sobraram sao as ultimas de cada chave
+    for node in new_entries:
+        if id(node) in matched:
+            continue
+        key = _key(node)
+        n = used.get(key, 0)
+        nodes = by_key[key]
+        if n < len(nodes) and nodes[n] is node:
+            out.append((key, None, node))
+            used[key] = n + 1
+    return out
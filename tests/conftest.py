@@ -0,0 +1,6 @@
+import os
+import sys
+
+# os modulos ficam soltos em pylib/, como no bench e no cli
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "pylib"))
@@ -0,0 +1,60 @@
+import os
+import nodekind
+
+SUITE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "suite")
+
+# (nome, texto) de cada arquivo .puls do suite/
+def suite_files():
+    out = []
+    for name in sorted(os.listdir(SUITE)):
+        if name.endswith(".puls"):
+            with open(os.path.join(SUITE, name), 'r', encoding='utf-8') as f:
+                out.append((name, f.read()))
+    return out
+
+def suite_names():
+    return [name for name, _ in suite_files()]
+
+def suite_text(name):
+    with open(os.path.join(SUITE, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+# a arvore como tuplas aninhadas de textos, para comparar
+# arvores de parsers diferentes
+def shape(node):
+    if node == None:
+        return None
+    if node.kind == nodekind.TERMINAL:
+        return node.value.text
+    out = []
+    stack = [(node, out)]
+    while len(stack) > 0:
+        n, dst = stack.pop()
+        for leaf in n.leaves:
+            if leaf == None:
+                dst.append(None)
+            elif leaf.kind == nodekind.TERMINAL:
+                dst.append(leaf.value.text)
+            else:
+                inner = []
+                dst.append(inner)
+                stack.append((leaf, inner))
+    return _freeze(out)
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple([_freeze(v) for v in value])
+    return value
+
+# o range de cada no em pre-ordem, como texto
+def ranges(node):
+    out = []
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        if n == None:
+            out.append(None)
+            continue
+        out.append(n.range.__str__())
+        stack.extend(reversed(n.leaves))
+    return out
@@ -0,0 +1,99 @@
+import io
+import asyncio
+import random
+import pytest
+import corpus
+from streaming import iterparse
+from asyncfeed import FeedParser, iterparse_reader
+from helpers import shape
+
+def expected(text):
+    out = []
+    for res in iterparse("m", io.StringIO(text)):
+        if res.failed():
+            out.append(res.error.__str__())
+            break
+        out.append(shape(res.value))
+    return out
+
+def collect(results):
+    out = []
+    for res in results:
+        if res.failed():
+            out.append(res.error.__str__())
+            break
+        out.append(shape(res.value))
+    return out
+
+async def read_all(text, seed):
+    reader = asyncio.StreamReader()
+    data = text.encode("utf-8")
+    rand = random.Random(seed)
+    async def produce():
+        i = 0
+        while i < len(data):
+            n = rand.randint(1, 9)
+            reader.feed_data(data[i:i+n])
+            i += n
+            await asyncio.sleep(0)
+        reader.feed_eof()
+    task = asyncio.ensure_future(produce())
+    out = []
+    async for res in iterparse_reader("m", reader, 5):
+        out.append(res)
+    await task
+    return out
+
+TEXTS = [
+    corpus.generate("config", 60, 1),
+    corpus.mixed(100, 2),
+    "a 'ção é'\nb ü\n  c\n",
+    "a 1\nb ]\nc 2\n",
+]
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_reader_matches_iterparse(text):
+    results = asyncio.run(read_all(text, 0))
+    assert collect(results) == expected(text)
+
+def test_feed_parser_splits_utf8():
+    async def run():
+        parser = FeedParser("m")
+        data = "a 'é'\nb 2\n".encode("utf-8")
+        for i in range(len(data)):
+            parser.feed(data[i:i+1])
+        parser.close()
+        return [res async for res in parser]
+    assert collect(asyncio.run(run())) == expected("a 'é'\nb 2\n")
+
+def test_feed_after_close():
+    async def run():
+        parser = FeedParser("m")
+        parser.close()
+        with pytest.raises(ValueError):
+            parser.feed(b"a")
+    asyncio.run(run())
+
+def test_yields_to_the_loop():
+    text = corpus.generate("strings", 3000, 1)
+    async def run():
+        parser = FeedParser("m", budget=0)
+        parser.feed(text.encode("utf-8"))
+        parser.close()
+        ticks = 0
+        done = False
+        async def ticker():
+            nonlocal ticks
+            while not done:
+                ticks += 1
+                await asyncio.sleep(0)
+        task = asyncio.ensure_future(ticker())
+        n = 0
+        async for res in parser:
+            n += 1
+        done = True
+        await task
+        return n, ticks
+    n, ticks = asyncio.run(run())
+    assert n == 3000
+    assert ticks > 100
@@ -0,0 +1,55 @@
+import pytest
+import binast
+from symbols import SymbolTable
+from parser import parse, parse_iterative
+from helpers import suite_names, suite_text, shape, ranges
+
+@pytest.mark.parametrize("name", suite_names())
+def test_round_trip(name):
+    text = suite_text(name)
+    root = parse(name, text, False).value
+    tree = binast.loads(binast.dumps(root, text))
+    node = tree.to_node()
+    assert shape(node) == shape(root)
+    assert ranges(node) == ranges(root)
+
+def test_lazy_nodes(tmp_path):
+    text = "f [a b]\n  c\n"
+    root = parse("m", text, False).value
+    path = str(tmp_path / "t.pa")
+    with open(path, 'wb') as f:
+        binast.dump(root, text, f)
+    tree = binast.load(path)
+    expr = tree.root().leaf(0)
+    assert expr.leaf(0).text == "f"
+    assert expr.leaf(1).leaf(1).text == "b"
+    assert expr.range.__str__() == root.leaves[0].range.__str__()
+
+def test_symbols():
+    text = "a b a\n'a' 1\n"
+    data = binast.dumps(parse("m", text, False).value, text)
+    table = SymbolTable()
+    table.intern("z")
+    tree = binast.loads(data, table)
+    first = tree.root().leaf(0)
+    assert first.leaf(0).symbol == first.leaf(2).symbol == table.lookup("a")
+    assert tree.root().leaf(1).leaf(0).symbol == None
+    node = tree.to_node()
+    lexemes = [l.value for l in node.leaves[0].leaves]
+    assert [l.symbol for l in lexemes] == [1, 2, 1]
+    assert lexemes[0].text is lexemes[2].text
+    assert node.leaves[1].leaves[0].value.symbol == None
+    assert binast.loads(data).symbols.names == []
+
+def test_str():
+    text = "f [a b] c\nd\n"
+    tree = binast.loads(binast.dumps(parse("m", text, False).value, text))
+    assert tree.root().__str__() == "((f (a b) c) d)"
+
+def test_str_of_deep_tree():
+    depth = 3000
+    text = "[" * depth + "a" + "]" * depth + "\n"
+    tree = binast.loads(binast.dumps(parse_iterative("m", text, False).value, text))
+    out = tree.root().__str__()
+    assert out.count("(") == depth + 1
+    assert out.endswith("a" + ")" * (depth + 1))
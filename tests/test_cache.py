@@ -0,0 +1,43 @@
+import os
+import pytest
+from parser import parse
+from cache import ParseCache
+from helpers import suite_names, suite_text, shape, ranges
+
+@pytest.mark.parametrize("name", suite_names())
+def test_cached_tree_matches_parse(tmp_path, name):
+    text = suite_text(name)
+    cache = ParseCache(str(tmp_path))
+    assert cache.get(name, text) == None
+    first = cache.parse(name, text)
+    again = cache.get(name, text)
+    assert again != None
+    assert shape(again.value) == shape(first.value)
+    assert ranges(again.value) == ranges(first.value)
+
+def test_cached_error_takes_the_new_modname(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.parse("a", "x ]\n")
+    res = cache.get("b", "x ]\n")
+    assert res.failed()
+    assert res.error.__str__() == parse("b", "x ]\n", False).error.__str__()
+
+def test_cache_is_keyed_by_content(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.parse("m", "a 1\n")
+    assert cache.get("m", "a 2\n") == None
+
+def test_cache_evicts_oldest(tmp_path):
+    cache = ParseCache(str(tmp_path), max_size=1)
+    cache.parse("m", "a 1\n")
+    cache.parse("m", "b 2\n")
+    assert len(os.listdir(str(tmp_path))) == 1
+    assert cache.get("m", "b 2\n") != None
+
+def test_cache_survives_corrupt_entries(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cache.parse("m", "a 1\n")
+    for name in os.listdir(str(tmp_path)):
+        with open(os.path.join(str(tmp_path), name), 'wb') as f:
+            f.write(b"lixo")
+    assert cache.get("m", "a 1\n") == None
@@ -0,0 +1,68 @@
+import os
+import sys
+import importlib.util
+from importlib.machinery import SourceFileLoader
+import pytest
+from helpers import SUITE
+
+# o cli eh um script sem extensao
+def load_cli():
+    path = os.path.join(os.path.dirname(SUITE), "pylib", "cli")
+    loader = SourceFileLoader("cli", path)
+    spec = importlib.util.spec_from_loader("cli", loader)
+    module = importlib.util.module_from_spec(spec)
+    # o Pool precisa achar as funcoes pelo nome do modulo
+    sys.modules["cli"] = module
+    loader.exec_module(module)
+    return module
+
+cli = load_cli()
+
+def test_check_file_reports_errors(tmp_path):
+    good = str(tmp_path / "good.puls")
+    bad = str(tmp_path / "bad.puls")
+    with open(good, 'w') as f:
+        f.write("a 1\n")
+    with open(bad, 'w') as f:
+        f.write("a ]\n")
+    assert not cli.check_file(good).failed
+    report = cli.check_file(bad)
+    assert report.failed
+    assert "unexpected token" in report.output
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_whole_suite(capsys, tmp_path, jobs):
+    assert cli.test_whole_dir(SUITE, str(tmp_path), jobs) == 0
+    out = capsys.readouterr().out
+    assert "errors:  0" in out
+
+def test_cached_run(capsys, tmp_path):
+    cli.test_whole_dir(SUITE, str(tmp_path), 1)
+    capsys.readouterr()
+    cli.test_whole_dir(SUITE, str(tmp_path), 1)
+    assert "cached:" in capsys.readouterr().out
+
+def write(tmp_path, name, text):
+    path = str(tmp_path / name)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+def test_parse_file_with_stats_prints_the_tree(capsys, tmp_path):
+    path = write(tmp_path, "good.puls", "f [a b]\n")
+    assert cli.parse_file(path, stats=True) == 0
+    out = capsys.readouterr().out
+    assert out.startswith("(f (a b))\n")
+    assert "tokens:" in out
+
+def test_parse_file_with_stats_reports_the_error(capsys, tmp_path):
+    path = write(tmp_path, "bad.puls", "a ]\n")
+    assert cli.parse_file(path, stats=True) == 1
+    out = capsys.readouterr().out
+    assert "unexpected token" in out
+    assert "tokens:" in out
+
+def test_parse_file_error(capsys, tmp_path):
+    path = write(tmp_path, "bad.puls", "a ]\n")
+    assert cli.parse_file(path) == 1
+    assert cli.parse_file(str(tmp_path / "missing.puls")) == 1
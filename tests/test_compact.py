@@ -0,0 +1,79 @@
+import pytest
+import nodekind
+from parser import parse, parse_stream
+from tokens import tokenize
+from core import LazyRange
+from symbols import SymbolTable
+from compact import parse_compact
+from helpers import suite_names, suite_text, shape
+
+def compact_shape(node):
+    if node.kind == nodekind.TERMINAL:
+        return node.text
+    return tuple([compact_shape(leaf) for leaf in node.leaves])
+
+@pytest.mark.parametrize("name", suite_names())
+def test_compact_matches_parse(name):
+    text = suite_text(name)
+    tree = parse_compact(name, text).value
+    assert compact_shape(tree.root) == shape(parse(name, text, False).value)
+
+def test_lazy_ranges():
+    text = "f [a b]\n  c\n"
+    tree = parse_compact("m", text).value
+    expr = tree.root.leaves[0]
+    assert tree.range(expr.leaves[1]).__str__() == "0:2 to 0:7"
+    assert tree.range(expr.leaves[2]).__str__() == "1:2 to 1:3"
+    assert tree.error(expr, "x").__str__() == "error m:0:0 to 1:3: x"
+
+def test_compact_error():
+    res = parse_compact("m", "a ]\n")
+    assert res.failed()
+    assert res.error.__str__() == parse("m", "a ]\n", False).error.__str__()
+
+def test_ranges_match_parse():
+    text = "a.b 'x\\'y' 12\n  [c [d] []] e.[f g]\n"
+    tree = parse_compact("m", text).value
+    root = parse("m", text, False).value
+    stack = [(tree.root, root)]
+    while len(stack) > 0:
+        c, n = stack.pop()
+        assert tree.range(c).__str__() == n.range.__str__()
+        stack.extend(zip(c.leaves, n.leaves))
+
+def test_string_atoms_keep_the_source_size():
+    tree = parse_compact("m", "'a\\nb'\n").value
+    atom = tree.root.leaves[0]
+    assert atom.text == "a\nb"
+    assert (atom.start, atom.end) == (0, 6)
+
+def test_repeated_texts_are_shared():
+    tree = parse_compact("m", "a 100000 'xy'\nb 100000 'xy'\n").value
+    first, second = tree.root.leaves
+    assert first.leaves[1].text is second.leaves[1].text
+    assert first.leaves[2].text is second.leaves[2].text
+
+def test_deep_list_range():
+    depth = 200
+    text = "[" * depth + "a.b c" + "]" * depth + "\n"
+    tree = parse_compact("m", text).value
+    node = tree.root.leaves[0]
+    assert (node.start, node.end) == (0, len(text) - 1)
+
+def test_stream_errors_are_lazy():
+    stream = tokenize("m", "a\nb ]\n")
+    err = parse_stream(stream, False).error
+    assert isinstance(err.range, LazyRange)
+    assert err.range.resolved == None
+    assert err.__str__() == "error m:1:2 to 1:3: unexpected token or symbol"
+
+def test_symbols():
+    table = SymbolTable()
+    res = parse_compact("m", "a b\n'a' a\n", table)
+    tree = res.value
+    assert res.symbols is table and tree.symbols is table
+    first, second = tree.root.leaves
+    assert tree.symbol(first.leaves[0]) == tree.symbol(second.leaves[1]) == table.lookup("a")
+    assert tree.symbol(second.leaves[0]) == None
+    assert tree.symbol(first) == None
+    assert parse_compact("m", "a ]\n").symbols != None
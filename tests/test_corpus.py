@@ -0,0 +1,14 @@
+import pytest
+import corpus
+from parser import parse
+
+@pytest.mark.parametrize("kind", corpus.KINDS)
+def test_generated_documents_parse(kind):
+    text = corpus.generate(kind, 100, 7)
+    assert parse("m", text, False).ok()
+    assert corpus.generate(kind, 100, 7) == text
+    assert corpus.generate(kind, 100, 8) != text
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        corpus.generate("nope", 10)
@@ -0,0 +1,110 @@
+import io
+import os
+import json
+import pytest
+import binast
+import lexkind
+import nodekind
+from core import Node, Lexeme, Range, Position
+from parser import parse, parse_iterative
+from emit import write_sexpr, write_json
+from helpers import suite_names, suite_text, shape
+
+def sexpr(node, buffer_size=16):
+    out = io.StringIO()
+    write_sexpr(node, out, buffer_size)
+    return out.getvalue()
+
+def test_node_str_uses_write_sexpr():
+    root = parse("m", "f [a b] c\n", False).value
+    assert root.__str__() == sexpr(root)
+    assert root.__str__() == "(f (a b) c)"
+
+def test_root_entries_on_their_own_lines():
+    root = parse("m", "a b\nc d\n", False).value
+    assert sexpr(root) == "(a b)\n(c d)"
+
+def test_first_break_is_indented():
+    root = parse("m", "f a\n  b\n  c\n", False).value
+    assert sexpr(root) == "(f a \n  b \n  c)"
+    root = parse("m", "f\n  g\n    h\n", False).value
+    assert sexpr(root) == "(f \n  (g \n    h))"
+
+def leaf(text, line=None):
+    range = None
+    if line != None:
+        range = Range(Position(line, 0), Position(line, len(text)))
+    return Node(Lexeme(text, lexkind.ID, range), nodekind.TERMINAL)
+
+def hand_built(lines):
+    root = Node(None, nodekind.LIST)
+    expr = Node(None, nodekind.LIST)
+    root.add_leaf(expr)
+    i = 0
+    for text in ["f", "a", "b"]:
+        expr.add_leaf(leaf(text, lines[i]))
+        i += 1
+    return root
+
+# arvores sem ranges nas listas ainda imprimem como a do parser
+def test_hand_built_tree():
+    root = hand_built([0, 1, 2])
+    assert root.__str__() == parse("m", "f\n  a\n  b\n", False).value.__str__()
+    assert hand_built([None, None, None]).__str__() == "(f a b)"
+    root = Node(None, nodekind.LIST)
+    root.add_leaf(Node(None, nodekind.LIST))
+    root.leaves[0].add_leaf(None)
+    root.leaves[0].add_leaf(leaf("a"))
+    assert root.__str__() == "(nil\n a)"
+
+def test_binast_tree_without_list_ranges():
+    text = "f [a b]\n  c\n"
+    root = parse("m", text, False).value
+    want = root.__str__()
+    stack = [root]
+    while len(stack) > 0:
+        n = stack.pop()
+        if n.kind == nodekind.LIST:
+            n.range = None
+            stack.extend(n.leaves)
+    node = binast.loads(binast.dumps(root, text)).to_node()
+    assert node.range == None
+    assert node.__str__() == want
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# a saida esperada de cada arquivo do suite/ fica em golden/
+@pytest.mark.parametrize("name", suite_names())
+def test_suite_output(name):
+    root = parse(name, suite_text(name), False).value
+    path = os.path.join(GOLDEN, name[:len(name)-5] + ".txt")
+    with open(path, 'r', encoding='utf-8') as f:
+        expected = f.read()
+    assert sexpr(root, 1) + "\n" == expected
+    assert parse_iterative(name, suite_text(name), False).value.__str__() + "\n" == expected
+
+@pytest.mark.parametrize("name", suite_names())
+def test_json_round_trips_the_shape(name):
+    root = parse(name, suite_text(name), False).value
+    out = io.StringIO()
+    write_json(root, out, 8)
+    assert _tuples(json.loads(out.getvalue())) == shape(root)
+
+def _tuples(value):
+    if isinstance(value, list):
+        return tuple([_tuples(v) for v in value])
+    return value
+
+def test_json_of_empty_document():
+    out = io.StringIO()
+    write_json(None, out)
+    assert out.getvalue() == "[]"
+
+def test_deep_tree_does_not_recurse():
+    depth = 5000
+    root = parse_iterative("m", "[" * depth + "a" + "]" * depth + "\n", False).value
+    text = sexpr(root)
+    assert text.count("(") == depth
+    out = io.StringIO()
+    write_json(root, out)
+    assert out.getvalue().count("[") == depth + 1
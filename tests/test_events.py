@@ -0,0 +1,56 @@
+import pytest
+import corpus
+import events
+from parser import parse
+from helpers import suite_names, suite_text, shape
+
+# monta tuplas aninhadas, como helpers.shape, a partir dos eventos
+def build(modname, text):
+    stack = [[]]
+    for ev in events.iterevents(modname, text):
+        kind = ev[0]
+        if kind == events.START_LIST:
+            stack.append([])
+        elif kind == events.END_LIST:
+            inner = stack.pop()
+            stack[-1].append(tuple(inner))
+        elif kind == events.ATOM:
+            stack[-1].append(ev[2])
+        elif kind == events.DOT_PAIR:
+            right = stack[-1].pop()
+            left = stack[-1].pop()
+            stack[-1].append((left, right))
+        else:
+            return ev[1]
+    root = stack[0]
+    if len(root) == 0:
+        return None
+    return root[0]
+
+def expected(modname, text):
+    res = parse(modname, text, False)
+    if res.failed():
+        return res.error
+    return shape(res.value)
+
+def same(modname, text):
+    got = build(modname, text)
+    want = expected(modname, text)
+    if isinstance(want, tuple) or want == None:
+        assert got == want
+    else:
+        assert got.__str__() == want.__str__()
+
+@pytest.mark.parametrize("name", suite_names())
+def test_events_match_parse_on_suite(name):
+    same(name, suite_text(name))
+
+@pytest.mark.parametrize("kind", corpus.KINDS)
+def test_events_match_parse_on_corpus(kind):
+    same("m", corpus.generate(kind, 200, 4))
+
+@pytest.mark.parametrize("text", ["a ]\n", "[a\n", "a\n    b\n  c\n", "a.\n"])
+def test_error_is_the_last_event(text):
+    evs = list(events.iterevents("m", text))
+    assert evs[-1][0] == events.ERROR
+    assert evs[-1][1].__str__() == parse("m", text, False).error.__str__()
@@ -0,0 +1,58 @@
+import pytest
+from parser import parse, parse_iterative
+from frozen import freeze, parse_frozen, HashConsTable
+from helpers import suite_names, suite_text, shape, ranges
+
+def frozen_shape(node):
+    if node == None:
+        return None
+    if node.text != None:
+        return node.text
+    return tuple([frozen_shape(leaf) for leaf in node.leaves])
+
+@pytest.mark.parametrize("name", suite_names())
+def test_freeze_keeps_the_shape(name):
+    root = parse(name, suite_text(name), False).value
+    assert frozen_shape(freeze(root)) == shape(root)
+
+def test_identical_subtrees_are_shared():
+    root = parse_frozen("m", "a [x y]\nb [x y]\n").value
+    assert root.leaves[0].leaves[1] is root.leaves[1].leaves[1]
+
+def test_equality():
+    text = suite_text("config.puls")
+    table = HashConsTable()
+    a = parse_frozen("m", text, table).value
+    b = parse_frozen("m", text, table).value
+    c = parse_frozen("m", text).value
+    d = parse_frozen("m", text + "z 1\n").value
+    assert a is b
+    assert a == c and a is not c
+    assert hash(a) == hash(c)
+    assert a != d
+
+def test_copy_is_free():
+    root = parse_frozen("m", "a 1\n").value
+    assert root.copy() is root
+
+def test_node_copy_is_deep():
+    root = parse("m", "f [a b]\n  c 1\n", False).value
+    copy = root.copy()
+    assert shape(copy) == shape(root)
+    assert ranges(copy) == ranges(root)
+    assert copy.leaves[0] is not root.leaves[0]
+    assert copy.leaves[0].range is not root.leaves[0].range
+    lexeme = root.leaves[0].leaves[0].value
+    other = lexeme.copy()
+    assert other.text == lexeme.text and other.symbol == lexeme.symbol
+
+def test_str():
+    root = parse_frozen("m", "f [a b] c\nd\n").value
+    assert root.__str__() == "((f (a b) c) d)"
+
+def test_str_of_deep_tree():
+    depth = 3000
+    root = freeze(parse_iterative("m", "[" * depth + "a" + "]" * depth + "\n", False).value)
+    text = root.__str__()
+    assert text.count("(") == depth + 1
+    assert text.endswith("a" + ")" * (depth + 1))
@@ -0,0 +1,79 @@
+import random
+import pytest
+import corpus
+from parser import parse
+import lexkind
+import nodekind
+import incremental
+from incremental import Document
+from helpers import suite_names, suite_text, shape, ranges
+
+def same_as_parse(doc):
+    res = doc.result()
+    want = parse("m", doc.string, False)
+    assert res.failed() == want.failed()
+    if want.failed():
+        assert res.error.__str__() == want.error.__str__()
+    elif want.value == None:
+        assert res.value == None
+    else:
+        assert shape(res.value) == shape(want.value)
+        assert ranges(res.value) == ranges(want.value)
+
+@pytest.mark.parametrize("name", suite_names())
+def test_document_matches_parse(name):
+    same_as_parse(Document("m", suite_text(name)))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits(seed):
+    rand = random.Random(seed)
+    doc = Document("m", corpus.generate("config", 80, seed))
+    pieces = ["a", " ", "\n", "x.y 1\n", "  ", "[", "]", "'s'", ""]
+    i = 0
+    while i < 40:
+        offset = rand.randint(0, len(doc.string))
+        deleted = rand.randint(0, min(5, len(doc.string) - offset))
+        doc.edit(offset, deleted, rand.choice(pieces))
+        same_as_parse(doc)
+        i += 1
+
+def test_edit_keeps_untouched_records():
+    # a edicao reparseia tambem um registro de cada lado
+    doc = Document("m", "a 1\nb 2\nc 3\nd 4\ne 5\n")
+    first = doc.results[0][0].value
+    last = doc.results[-1][0].value
+    doc.edit(doc.string.index("3"), 1, "33")
+    assert doc.results[0][0].value is first
+    assert doc.results[-1][0].value is last
+    same_as_parse(doc)
+
+def test_edit_shifts_lines():
+    doc = Document("m", "a 1\nb 2\n")
+    doc.edit(0, 0, "z 0\n\n")
+    assert doc.result().value.leaves[-1].range.start.line == 3
+
+def id_lexemes(node):
+    out = []
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        if n.kind == nodekind.LIST:
+            stack.extend(n.leaves)
+        elif n.value.kind == lexkind.ID:
+            out.append(n.value)
+    return out
+
+def test_symbol_table_does_not_grow_forever():
+    doc = Document("m", "a 1\nb 2\nc 3\n")
+    i = 0
+    while i < 3000:
+        # cada edit troca o nome do registro do meio
+        name = "name" + str(i)
+        end = doc.string.index(" ", 4)
+        doc.edit(4, end - 4, name)
+        i += 1
+    res = doc.result()
+    assert len(res.symbols) < 2 * 3 + incremental._SYMBOLS_SLACK + 2
+    for l in id_lexemes(res.value):
+        assert res.symbols.name(l.symbol) == l.text
+    same_as_parse(doc)
@@ -0,0 +1,47 @@
+import pytest
+from parser import parse
+from instrument import Hook, ProductionStats
+
+class Recorder(Hook):
+    def __init__(self):
+        self.events = []
+        self.depth = 0
+
+    def enter(self, name, parser):
+        self.events.append(name)
+        self.depth += 1
+
+    def exit(self, name, parser):
+        self.depth -= 1
+
+def test_hook_sees_every_production_balanced():
+    hook = Recorder()
+    res = parse("m", "f [a b].c\n  d\n", False, hook)
+    assert res.ok()
+    assert hook.depth == 0
+    assert hook.events[0] == "_block"
+    assert "_s_expr" in hook.events
+
+def test_hook_does_not_change_the_result():
+    text = "f [a b].c\n  d\n"
+    assert parse("m", text, False, ProductionStats()).value.__str__() == parse("m", text, False).value.__str__()
+
+def test_production_stats():
+    stats = ProductionStats()
+    parse("m", "a 1\nb [c d]\n", False, stats)
+    assert stats.tokens > 0
+    assert stats.max_depth > 1
+    names = [row[0] for row in stats.rows()]
+    assert len(names) == len(set(names))
+    assert "tokens:" in stats.__str__()
+
+class Failing(Recorder):
+    def token(self, parser):
+        if len(self.events) > 5:
+            raise ValueError("stop")
+
+def test_exit_runs_when_a_production_raises():
+    hook = Failing()
+    with pytest.raises(ValueError):
+        parse("m", "f [a [b c]].d\n", False, hook)
+    assert hook.depth == 0
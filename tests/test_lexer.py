@@ -0,0 +1,71 @@
+import pytest
+import lexkind
+from lexer import Lexer, FastLexer, SourceLexeme, lex, _process_str
+from symbols import SymbolTable
+from helpers import suite_names, suite_text
+
+# todos os tokens, ate o EOF ou INVALID
+def tokens(lexer):
+    out = []
+    l = lexer.next()
+    out.append(l)
+    while not (l.kind in [lexkind.EOF, lexkind.INVALID]):
+        l = lexer.next()
+        out.append(l)
+    return [(l.text, l.kind, l.range.__str__()) for l in out]
+
+TRICKY = [
+    "",
+    "a.b.c [d e]\n",
+    "x 'a\\'b' '\\n' 'c\\\\'\n",
+    "0x1f 0b101 1_000 22/7 1.5e~3 ~3\n",
+    "a # comentario\n  b\r\n",
+    "'sem fim",
+    "a ; b",
+    "é 1",
+]
+
+@pytest.mark.parametrize("name", suite_names())
+def test_fast_lexer_matches_lexer_on_suite(name):
+    text = suite_text(name)
+    assert tokens(FastLexer(name, text)) == tokens(Lexer(name, text))
+
+@pytest.mark.parametrize("text", TRICKY)
+def test_fast_lexer_matches_lexer_on_edge_cases(text):
+    assert tokens(FastLexer("m", text)) == tokens(Lexer("m", text))
+
+def test_lex_drops_eof():
+    out = lex("m", "a b\n")
+    assert [l.kind for l in out] == [lexkind.ID, lexkind.ID, lexkind.NL]
+
+def test_fast_lexer_starting_line():
+    l = FastLexer("m", "a", 7).next()
+    assert l.range.start.line == 7
+
+def test_process_str():
+    assert _process_str("plain") == "plain"
+    assert _process_str("a\\nb") == "a\nb"
+    assert _process_str("a\\'b") == "a'b"
+    assert _process_str("a\\\\b") == "a\\b"
+
+def test_source_lexeme_decodes_once():
+    source = "x 'a\\nb'\n"
+    l = FastLexer("m", source).all_tokens()[1]
+    assert isinstance(l, SourceLexeme)
+    assert l.decoded == None
+    text = l.text
+    assert text == "a\nb"
+    assert l.text is text
+
+def test_ids_with_symbols_share_the_table_string():
+    symbols = SymbolTable()
+    tokens = FastLexer("m", "abc abc\n", 0, symbols).all_tokens()
+    assert not isinstance(tokens[0], SourceLexeme)
+    assert tokens[0].text is tokens[1].text
+    assert tokens[0].symbol == tokens[1].symbol
+
+def test_copy_does_not_keep_the_source():
+    l = FastLexer("m", "'abc'\n").all_tokens()[0]
+    out = l.copy()
+    assert not isinstance(out, SourceLexeme)
+    assert out.text == "abc"
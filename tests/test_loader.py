@@ -0,0 +1,40 @@
+from fractions import Fraction
+import io
+import loader
+
+def test_mapping():
+    text = ("mode.normal 'NORMAL'\n"
+            "exec --x 'ls'\n"
+            "age.25\n"
+            "fullscreen\n"
+            "bindsym Print\n"
+            "  exec 'shot'\n"
+            "list [1 2/3 nil]\n")
+    res = loader.loads("m", text)
+    assert res.value == {
+        "mode": {"normal": "NORMAL"},
+        "exec": ["--x", "ls"],
+        "age": 25,
+        "fullscreen": True,
+        "bindsym": {"Print": {"exec": "shot"}},
+        "list": [1, Fraction(2, 3), None],
+    }
+
+def test_repeated_keys_merge():
+    res = loader.loads("m", "a.b 1\na.c 2\na.b 3\n")
+    assert res.value == {"a": {"b": 3, "c": 2}}
+
+def test_strings_are_unescaped():
+    assert loader.loads("m", "s 'a\\'b\\n'\n").value == {"s": "a'b\n"}
+
+def test_errors():
+    assert loader.loads("m", "a ]\n").failed()
+    assert loader.loads("m", "a 1.\n").error.message == "invalid number"
+    assert loader.loads("m", "a 1e400\n").error.message == "number out of range"
+    assert loader.loads("m", "[a b].c 1\n").error.message == "expected key"
+
+def test_load_file():
+    assert loader.load("m", io.StringIO("a 1\n")).value == {"a": 1}
+
+def test_empty():
+    assert loader.loads("m", "").value == {}
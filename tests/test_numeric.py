@@ -0,0 +1,77 @@
+from fractions import Fraction
+import pytest
+import numeric
+from core import UNDECODED
+from parser import parse
+
+@pytest.mark.parametrize("text, value", [
+    ("123", 123),
+    ("1_000", 1000),
+    ("~5", -5),
+    ("0x1F", 31),
+    ("0b1010", 10),
+    ("22/7", Fraction(22, 7)),
+    ("~1/3", Fraction(-1, 3)),
+    ("3.14", 3.14),
+    ("1.6e~10", 1.6e-10),
+    ("2e10", 2e10),
+])
+def test_decode(text, value):
+    out = numeric.decode(text)
+    assert out == value
+    assert type(out) == type(value)
+
+@pytest.mark.parametrize("text", ["1.", "0x", "0b", "1e", "1/"])
+def test_decode_malformed(text):
+    assert numeric.decode(text) == None
+
+# o expoente passa do que um float guarda
+@pytest.mark.parametrize("text", ["1e400", "~1e400", "1.5e400", "9" * 400 + ".0", "1e~400", "0.001e~330"])
+def test_decode_float_out_of_range(text):
+    assert numeric.decode(text) == None
+
+@pytest.mark.parametrize("text, value", [("0e~400", 0.0), ("0.0e400", 0.0), ("1e~310", 1e-310)])
+def test_decode_float_limits(text, value):
+    assert numeric.decode(text) == value
+
+def test_number_caches_on_the_lexeme():
+    lexeme = parse("m", "x 42\n", False).value.leaves[0].leaves[1].value
+    assert lexeme.number is UNDECODED
+    assert numeric.number(lexeme) == 42
+    assert lexeme.number == 42
+    assert lexeme.copy().number == 42
+
+def test_number_caches_invalid_text():
+    lexeme = parse("m", "x 1.\n", False).value.leaves[0].leaves[1].value
+    assert numeric.number(lexeme) == None
+    assert lexeme.number == None
+    lexeme.text = "2" # nao eh decodificado de novo
+    assert numeric.number(lexeme) == None
+
+def test_decode_numbers():
+    root = parse("m", "a 1 2.5\nb [3 x 1/2]\n", False).value
+    res = numeric.decode_numbers("m", root)
+    assert list(res.value) == [1.0, 2.5, 3.0, 0.5]
+
+def test_decode_numbers_integer_typecode():
+    root = parse("m", "a 1 2.5\n", False).value
+    res = numeric.decode_numbers("m", root, "q")
+    assert res.error.message == "expected integer"
+    root = parse("m", "a 1 99999999999999999999\n", False).value
+    assert numeric.decode_numbers("m", root, "q").error.message == "number out of range"
+
+def test_decode_numbers_float_overflow():
+    root = parse("m", "a 1 " + "9" * 400 + "\n", False).value
+    res = numeric.decode_numbers("m", root)
+    assert res.error.message == "number out of range"
+    assert res.error.range.start.column == 4
+    root = parse("m", "a " + "9" * 400 + "/7\n", False).value
+    assert numeric.decode_numbers("m", root).error.message == "number out of range"
+
+@pytest.mark.parametrize("text", ["1e400", "1e~400"])
+def test_decode_numbers_float_exponent_out_of_range(text):
+    root = parse("m", "a 1 " + text + "\n", False).value
+    res = numeric.decode_numbers("m", root)
+    assert res.value == None
+    assert res.error.message == "number out of range"
+    assert res.error.range.start.column == 4
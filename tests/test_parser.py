@@ -0,0 +1,88 @@
+import pytest
+import corpus
+import nodekind
+from parser import parse, parse_stream, parse_iterative, parse_stream_iterative
+from tokens import tokenize
+from helpers import suite_names, suite_text, shape, ranges
+
+def all_parsers(modname, text):
+    return [
+        parse(modname, text, False),
+        parse_stream(tokenize(modname, text), False),
+        parse_iterative(modname, text, False),
+        parse_stream_iterative(tokenize(modname, text), False),
+    ]
+
+def same_results(results):
+    first = results[0]
+    for res in results[1:]:
+        assert res.failed() == first.failed()
+        if first.failed():
+            assert res.error.__str__() == first.error.__str__()
+        else:
+            assert shape(res.value) == shape(first.value)
+            if first.value != None:
+                assert ranges(res.value) == ranges(first.value)
+
+BROKEN = [
+    "a ]\n",
+    "[a b\n",
+    "a.\n",
+    "a\n    b\n  c\n",
+    "a 'x\n",
+    "a ; b\n",
+]
+
+@pytest.mark.parametrize("name", suite_names())
+def test_parsers_agree_on_suite(name):
+    results = all_parsers(name, suite_text(name))
+    assert results[0].ok()
+    same_results(results)
+
+@pytest.mark.parametrize("text", BROKEN)
+def test_parsers_agree_on_errors(text):
+    results = all_parsers("m", text)
+    assert results[0].failed()
+    same_results(results)
+
+@pytest.mark.parametrize("kind", corpus.KINDS)
+def test_parsers_agree_on_corpus(kind):
+    same_results(all_parsers("m", corpus.generate(kind, 200, 1)))
+
+def test_empty_document():
+    assert parse("m", "", False).value == None
+    assert parse("m", "\n\n# so comentario\n", False).value == None
+
+def test_shapes():
+    assert shape(parse("m", "f [a b] c\n", False).value) == (("f", ("a", "b"), "c"),)
+    assert shape(parse("m", "a.b.c\n", False).value) == ((("a", "b"), "c"),)
+    assert shape(parse("m", "f\n  a\n  b c\n", False).value) == (("f", "a", ("b", "c")),)
+
+# linhas irmas com um par no inicio nao viram blocos umas das outras
+def test_dotted_lines_are_siblings():
+    text = "mode.normal 'N'\nmode.insert 'I'\n"
+    assert len(parse("m", text, False).value.leaves) == 2
+    text = "e\n  mode.normal 'N'\n  mode.insert 'I'\n"
+    assert len(parse("m", text, False).value.leaves[0].leaves) == 3
+
+def test_ranges_at_parse_time():
+    root = parse("m", "f [a b]\n  c\n", False).value
+    expr = root.leaves[0]
+    assert expr.range.__str__() == "0:0 to 1:3"
+    assert expr.leaves[1].range.__str__() == "0:2 to 0:7"
+
+def test_error_position():
+    res = parse("m", "a\nb ]\n", False)
+    assert res.error.__str__() == "error m:1:2 to 1:3: unexpected token or symbol"
+
+def test_deep_nesting_iterative():
+    depth = 5000
+    text = "[" * depth + "a" + "]" * depth + "\n"
+    res = parse_iterative("m", text, False)
+    assert res.ok()
+    node = res.value
+    n = 0
+    while node.kind == nodekind.LIST and len(node.leaves) > 0:
+        node = node.leaves[0]
+        n += 1
+    assert n == depth + 1
@@ -0,0 +1,40 @@
+import pytest
+from parser import parse
+from query import compile_query, KeyIndex, WILDCARD
+from helpers import suite_text
+
+CONFIG = suite_text("config.puls")
+
+def find(path, text, indexed):
+    root = parse("m", text, False).value
+    q = compile_query(path).value
+    if indexed:
+        return q.find(root, KeyIndex(root))
+    return q.find(root)
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_nested_path(indexed):
+    out = find("editor.statusline mode.insert", CONFIG, indexed)
+    assert len(out) == 1
+    assert out[0].leaves[1].value.text == "INSERT"
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_index_and_walk_agree(indexed):
+    text = "a\n  b 1\n  c\n    b 2\nb 3\n"
+    walk = find("b", text, False)
+    assert [n.leaves[1].value.text for n in find("b", text, indexed)] == ["1", "2", "3"]
+    assert len(walk) == 3
+    assert len(find("a b", text, indexed)) == 1
+    assert len(find("a *", text, indexed)) == 2
+
+def test_compile_errors():
+    assert compile_query("").failed()
+    assert compile_query("a..b").failed()
+    assert compile_query("'x'").failed()
+    assert compile_query("a *").value.keys == [("a",), WILDCARD]
+
+def test_first():
+    root = parse("m", "a 1\na 2\n", False).value
+    q = compile_query("a").value
+    assert q.first(root).leaves[1].value.text == "1"
+    assert compile_query("z").value.first(root) == None
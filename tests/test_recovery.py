@@ -0,0 +1,29 @@
+import pytest
+from parser import parse
+from recovery import parse_recovering
+from helpers import suite_names, suite_text, shape
+
+@pytest.mark.parametrize("name", suite_names())
+def test_no_errors_matches_parse(name):
+    text = suite_text(name)
+    root, errors = parse_recovering(name, text)
+    assert errors == []
+    assert shape(root) == shape(parse(name, text, False).value)
+
+@pytest.mark.parametrize("text", ["a ]\n", "[a\n", "a\n    b\n  c\n", "a.\n", "a ;\n"])
+def test_first_error_matches_parse(text):
+    _, errors = parse_recovering("m", text)
+    assert errors[0].__str__() == parse("m", text, False).error.__str__()
+
+def test_reports_every_bad_line():
+    root, errors = parse_recovering("m", "a ]\nb 1\nc [d\ne 2\n")
+    assert len(errors) == 2
+    assert [err.range.start.line for err in errors] == [0, 2]
+    # as linhas boas continuam na arvore
+    assert ("b", "1") in shape(root)
+    assert ("e", "2") in shape(root)
+
+def test_resyncs_inside_s_expr():
+    root, errors = parse_recovering("m", "f [a ; b] c\n")
+    assert len(errors) == 1
+    assert shape(root)[0][0] == "f"
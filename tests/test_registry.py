@@ -0,0 +1,67 @@
+import os
+from registry import ModuleRegistry, ADDED, CHANGED, REMOVED
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def bump(path):
+    # garante um mtime diferente mesmo em sistemas de arquivos lentos
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+
+def kinds(updates):
+    return [(u.kind, os.path.basename(u.module.path)) for u in updates]
+
+def test_refresh_only_reports_changes(tmp_path):
+    a = str(tmp_path / "a.puls")
+    b = str(tmp_path / "b.puls")
+    write(a, "a 1\n")
+    write(b, "b ]\n")
+    write(str(tmp_path / "c.txt"), "nao eh puls")
+    registry = ModuleRegistry(str(tmp_path))
+    assert kinds(registry.refresh()) == [(ADDED, "a.puls"), (ADDED, "b.puls")]
+    assert registry.get("b").failed()
+    assert not registry.get("a").failed()
+    assert registry.refresh() == []
+
+    write(b, "b 2\n")
+    bump(b)
+    assert kinds(registry.refresh()) == [(CHANGED, "b.puls")]
+    assert not registry.get("b").failed()
+
+    os.remove(a)
+    assert kinds(registry.refresh()) == [(REMOVED, "a.puls")]
+    assert registry.get("a") == None
+    assert len(registry) == 1
+
+def test_same_content_is_not_reparsed(tmp_path):
+    a = str(tmp_path / "a.puls")
+    write(a, "a 1\n")
+    registry = ModuleRegistry(str(tmp_path))
+    registry.refresh()
+    result = registry.get("a").result
+    write(a, "a 1\n")
+    bump(a)
+    assert registry.refresh() == []
+    assert registry.get("a").result is result
+
+def test_invalid_utf8(tmp_path):
+    with open(str(tmp_path / "x.puls"), 'wb') as f:
+        f.write(b"a \xff\n")
+    registry = ModuleRegistry(str(tmp_path))
+    registry.refresh()
+    assert registry.get("x").failed()
+
+def test_each_module_has_its_own_symbols(tmp_path):
+    a = str(tmp_path / "a.puls")
+    write(a, "first 1\n")
+    registry = ModuleRegistry(str(tmp_path))
+    registry.refresh()
+    old = registry.get("a").result.symbols
+    write(a, "second 2\n")
+    bump(a)
+    registry.refresh()
+    symbols = registry.get("a").result.symbols
+    assert symbols is not old
+    assert symbols.names == ["second"]
@@ -0,0 +1,33 @@
+from core import Position, Range
+from sourcemap import SourceMap
+from parser import parse
+
+TEXT = "ab\ncde\n\nf"
+
+def test_offsets_and_positions():
+    m = SourceMap(TEXT)
+    assert m.line_count() == 4
+    i = 0
+    while i <= len(TEXT):
+        pos = m.position(i)
+        assert m.offset(pos) == i
+        i += 1
+    assert m.position(4).__str__() == "1:1"
+
+def test_lines():
+    m = SourceMap(TEXT)
+    assert [m.line(i) for i in range(4)] == ["ab", "cde", "", "f"]
+    assert m.line(10) == ""
+
+def test_snippet_marks_the_range():
+    m = SourceMap(TEXT)
+    out = m.snippet(Range(Position(1, 1), Position(1, 2)))
+    assert out == "c\033[0;31md\033[0me"
+
+# o erro no fim de um arquivo, como no cli
+def test_snippet_of_parse_error():
+    source = "a b\nc d\na ] b\n"
+    res = parse("m", source, False)
+    assert res.failed()
+    out = SourceMap(source).snippet(res.error.range)
+    assert out == "a \033[0;31m]\033[0m b"
@@ -0,0 +1,77 @@
+import io
+import random
+import pytest
+import corpus
+from parser import parse
+from streaming import iterparse, RecordSplitter
+from helpers import suite_names, suite_text, shape, ranges
+
+def streamed(text, chunk_size=65536):
+    return list(iterparse("m", io.StringIO(text), chunk_size))
+
+def leaves(text):
+    res = parse("m", text, False)
+    if res.value == None:
+        return []
+    return res.value.leaves
+
+@pytest.mark.parametrize("name", suite_names())
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_iterparse_matches_parse(name, chunk_size):
+    text = suite_text(name)
+    results = streamed(text, chunk_size)
+    assert all([res.ok() for res in results])
+    got = [res.value for res in results if res.value != None]
+    want = leaves(text)
+    assert [shape(n) for n in got] == [shape(n) for n in want]
+    # as linhas continuam relativas ao arquivo
+    assert [ranges(n) for n in got] == [ranges(n) for n in want]
+
+def test_iterparse_yields_one_result_per_record():
+    text = corpus.generate("config", 300, 2)
+    results = streamed(text, 100)
+    assert len(results) == len(leaves(text))
+
+def test_iterparse_stops_at_first_error():
+    results = streamed("a 1\nb ]\nc 2\n")
+    assert [res.ok() for res in results] == [True, False]
+    assert results[1].error.__str__() == parse("m", "a 1\nb ]\nc 2\n", False).error.__str__()
+
+def test_indented_document():
+    text = "  a 1\n  b 2\n"
+    results = streamed(text, 3)
+    assert [shape(res.value) for res in results] == [shape(n) for n in leaves(text)]
+
+def records(text):
+    splitter = RecordSplitter()
+    out = splitter.feed(text)
+    out.append(splitter.close())
+    return out
+
+def test_indented_document_is_split_at_its_base():
+    text = "\n  # c\n  a 1\n    b 2\n\n  c\n    d\n      e\n  f\n"
+    assert [line for _, line in records(text)] == [0, 5, 8]
+    results = streamed(text, 5)
+    want = leaves(text)
+    assert [shape(res.value) for res in results] == [shape(n) for n in want]
+    assert [ranges(res.value) for res in results] == [ranges(n) for n in want]
+
+def test_line_before_the_base_is_an_error():
+    text = "  a 1\nb 2\n  c 3\n"
+    # a linha fica no registro anterior, que falha inteiro
+    results = streamed(text)
+    assert [res.ok() for res in results] == [False]
+    assert results[0].error.__str__() == parse("m", text, False).error.__str__()
+
+def test_record_splitter_handles_any_chunking():
+    text = corpus.mixed(200, 3)
+    rand = random.Random(0)
+    splitter = RecordSplitter()
+    records = []
+    i = 0
+    while i < len(text):
+        n = rand.randint(1, 40)
+        records += splitter.feed(text[i:i+n])
+        i += n
+    records.append(splitter.close())
+    assert "".join([r[0] for r in records]) == text
@@ -0,0 +1,47 @@
+import io
+from parser import parse, parse_iterative
+from symbols import SymbolTable
+from streaming import iterparse
+
+def ids(node, out):
+    stack = [node]
+    while len(stack) > 0:
+        n = stack.pop()
+        if n == None:
+            continue
+        if n.kind == 0:
+            out.append(n.value)
+        else:
+            stack.extend(n.leaves)
+    return out
+
+def test_table():
+    table = SymbolTable()
+    assert table.intern("a") == 0
+    assert table.intern("b") == 1
+    assert table.intern("a") == 0
+    assert table.lookup("c") == None
+    assert table.name(1) == "b"
+    assert len(table) == 2
+
+def test_parse_interns_ids():
+    res = parse("m", "a b a\nb 1\n", False)
+    assert len(res.symbols) == 2
+    for lexeme in ids(res.value, []):
+        if lexeme.symbol != None:
+            assert res.symbols.name(lexeme.symbol) == lexeme.text
+    symbols = [l.symbol for l in ids(res.value, []) if l.text == "a"]
+    assert len(symbols) == 2 and symbols[0] == symbols[1]
+
+def test_shared_table():
+    table = SymbolTable()
+    parse("m", "a b\n", False, symbols=table)
+    res = parse_iterative("m", "b c\n", False, symbols=table)
+    assert res.symbols is table
+    assert table.lookup("c") == 2
+
+def test_iterparse_shares_one_table():
+    table = SymbolTable()
+    for res in iterparse("m", io.StringIO("a 1\nb 2\na 3\n"), 4, table):
+        assert res.symbols is table or res.symbols == None
+    assert len(table) == 2
@@ -0,0 +1,76 @@
+import pytest
+import tracemalloc
+import numeric
+from lexer import FastLexer, lex
+from tokens import tokenize
+from parser import parse, parse_stream, parse_stream_iterative
+from symbols import SymbolTable
+from helpers import suite_names, suite_text, ranges
+
+def described(lexemes):
+    return [(l.text, l.kind, l.range.__str__(), l.symbol) for l in lexemes]
+
+@pytest.mark.parametrize("name", suite_names())
+def test_lexemes_match_lex(name):
+    text = suite_text(name)
+    symbols = SymbolTable()
+    expected = described(tokenize(name, text, symbols).lexemes())
+    ids = SymbolTable()
+    assert described(FastLexer(name, text, 0, ids).all_tokens()) == expected
+    assert [l.text for l in lex(name, text)] == [e[0] for e in expected]
+
+def test_ids_are_interned():
+    stream = tokenize("m", "abc 'abc' abc 1\n")
+    assert stream.symbol(0) == stream.symbol(2) == 0
+    assert stream.symbol(1) == None and stream.symbol(3) == None
+    assert stream.text(0) is stream.text(2)
+    assert len(stream.symbols) == 1
+
+def test_shared_table():
+    symbols = SymbolTable()
+    symbols.intern("x")
+    stream = tokenize("m", "y x\n", symbols)
+    assert stream.symbols is symbols
+    assert [stream.symbol(0), stream.symbol(1)] == [1, 0]
+
+def test_views_have_symbol_and_number():
+    stream = tokenize("m", "a 42\n")
+    res = parse_stream(stream, False)
+    a, n = res.value.leaves[0].leaves
+    assert a.value.symbol == res.symbols.lookup("a")
+    assert n.value.symbol == None
+    assert numeric.number(n.value) == 42
+    assert n.value.number == 42
+    assert n.value.copy().symbol == None
+    assert a.value.copy().symbol == a.value.symbol
+
+@pytest.mark.parametrize("parser", [parse_stream, parse_stream_iterative])
+def test_parse_stream_returns_the_table(parser):
+    stream = tokenize("m", "a b\nc a\n")
+    res = parser(stream, False)
+    assert res.symbols is stream.symbols
+    assert res.symbols.names == ["a", "b", "c"]
+    assert parse("m", "a b\nc a\n", False).symbols.names == res.symbols.names
+
+def retained(fn):
+    tracemalloc.start()
+    out = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+# os terminais tiram o range do stream so quando usado,
+# e os NLs descartados nem viram no
+def test_parse_stream_retains_less_than_parse():
+    text = "".join([suite_text(name) for name in suite_names()]) * 5
+    tree = retained(lambda: parse("m", text, False))
+    stream_tree = retained(lambda: parse_stream(tokenize("m", text), False))
+    assert stream_tree < tree
+
+def test_lazy_terminal_ranges():
+    text = "f [a b]\n\n  c 'x'\n"
+    res = parse_stream(tokenize("m", text), False)
+    assert ranges(res.value) == ranges(parse("m", text, False).value)
+    block = res.value.leaves[0].leaves[2]
+    assert block.range.__str__() == "2:2 to 2:7"
+    assert block.leaves[0].range.__str__() == "2:2 to 2:3"
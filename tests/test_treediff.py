@@ -0,0 +1,81 @@
+from parser import parse
+from treediff import diff, Snapshot, ADDED, REMOVED, MODIFIED
+from frozen import HashConsTable
+
+BASE = ("editor.statusline\n"
+        "  mode.normal 'N'\n"
+        "  mode.insert 'I'\n"
+        "bindsym Print\n"
+        "  exec 'x'\n"
+        "fullscreen\n"
+        "gaps 4\n")
+
+def changes(old, new):
+    return [c.__str__() for c in diff(parse("m", old, False).value, parse("m", new, False).value)]
+
+def test_no_changes():
+    assert changes(BASE, BASE) == []
+
+def test_nested_modification():
+    assert changes(BASE, BASE.replace("'I'", "'INS'")) == ["modified editor.statusline mode.insert"]
+
+def test_added_and_removed():
+    assert changes(BASE, BASE.replace("gaps 4\n", "")) == ["removed gaps"]
+    assert changes(BASE, BASE + "font 'mono'\n") == ["added font"]
+    assert changes("", "a 1\n") == ["added a"]
+    assert changes("a 1\n", "") == ["removed a"]
+
+def test_leaf_entry_modification():
+    assert changes(BASE, BASE.replace("fullscreen", "fullscreen 0")) == ["modified fullscreen"]
+
+def test_repeated_keys_match_in_order():
+    assert changes("d 1\nd 2\n", "d 1\nd 3\nd 4\n") == ["modified d", "added d"]
+
+def test_change_nodes():
+    old = parse("m", "a 1\n", False).value
+    new = parse("m", "a 2\n", False).value
+    out = diff(old, new)
+    assert out[0].kind == MODIFIED
+    assert out[0].old is old.leaves[0]
+    assert out[0].new is new.leaves[0]
+    assert out[0].path() == "a"
+
+def test_snapshots_share_a_table():
+    table = HashConsTable()
+    current = Snapshot(parse("m", BASE, False).value, table)
+    new = Snapshot(parse("m", BASE + "x 1\n", False).value, table)
+    assert [c.kind for c in current.diff(new)] == [ADDED]
+    assert [c.kind for c in new.diff(current)] == [REMOVED]
+
+def test_unchanged_records_reuse_the_previous_snapshot():
+    table = HashConsTable()
+    current = Snapshot(parse("m", BASE, False).value, table, BASE)
+    text = BASE.replace("gaps 4", "gaps 8")
+    root = parse("m", text, False).value
+    new = Snapshot(root, table, text, current)
+    # so a entrada que mudou e a raiz foram congeladas
+    assert len(new.frozen) == len(root.leaves) + len(root.leaves[-1].leaves) + 1
+    assert new.frozen[id(root.leaves[0])] is current.records[BASE[:BASE.index("bindsym")]]
+    assert [c.__str__() for c in current.diff(new)] == ["modified gaps"]
+
+def test_nested_change_with_reused_snapshots():
+    table = HashConsTable()
+    current = Snapshot(parse("m", BASE, False).value, table, BASE)
+    text = BASE.replace("'I'", "'INS'")
+    new = Snapshot(parse("m", text, False).value, table, text, current)
+    assert [c.__str__() for c in current.diff(new)] == ["modified editor.statusline mode.insert"]
+    again = Snapshot(parse("m", BASE, False).value, table, BASE, new)
+    assert [c.__str__() for c in new.diff(again)] == ["modified editor.statusline mode.insert"]
+
+def test_source_that_does_not_split_like_the_tree():
+    text = "  a 1\n  b 2\n"
+    table = HashConsTable()
+    current = Snapshot(parse("m", text, False).value, table, text)
+    assert current.records == {}
+    new = Snapshot(parse("m", "  a 1\n  b 3\n", False).value, table, "  a 1\n  b 3\n", current)
+    assert [c.__str__() for c in current.diff(new)] == ["modified b"]
+
+def test_equal_entries_match_before_keys():
+    # a entrada 'd 2' so mudou de lugar
+    assert changes("d 1\nd 2\n", "d 2\nd 3\n") == ["modified d"]
+    assert changes("a 1\nb 2\n", "b 2\na 1\n") == []